@@ -1,8 +1,11 @@
-from videosdk.agents import Agent, AgentSession, Pipeline, WorkerJob, JobContext, RoomOptions, function_tool
+import asyncio
+import random
+from videosdk.agents import Agent, AgentSession, Pipeline, WorkerJob, JobContext, RoomOptions, TTSAudioCache, function_tool
 from videosdk.plugins.openai import OpenAILLM,OpenAITTS
 from videosdk.plugins.deepgram import DeepgramSTT
 from videosdk.plugins.silero import SileroVAD
 from videosdk.plugins.turn_detector import TurnDetector, pre_download_model
+from thinking_scheduler import ThinkingScheduler, hide_latency
 import logging
 logging.basicConfig(level=logging.INFO)
 
@@ -11,10 +14,11 @@ pre_download_model()
 class VoiceAgent(Agent):
     def __init__(self):
         super().__init__(
-            instructions="You are a helpful voice assistant that can answer questions and help with tasks. If the user asks to play music, use the control_background_music tool with action 'play'. To stop, use the action 'stop'.",
+            instructions="You are a helpful voice assistant that can answer questions and help with tasks. If the user asks to play music, use the control_background_music tool with action 'play'. To stop, use the action 'stop'. Use the check_order_status tool to look up orders.",
         )
-        self.set_thinking_audio()
-        
+        # Covers slow tool calls with thinking audio or a filler phrase; set in the entrypoint
+        self.thinking: ThinkingScheduler | None = None
+
     async def on_enter(self) -> None:
         await self.session.say("Hello, how can I help you today?")
     
@@ -28,22 +32,46 @@ class VoiceAgent(Agent):
         :param action: 'play' to start the music, 'stop' to end it.
         """
         if action.lower() == "play":
+            if self.thinking:
+                self.thinking.suppressed = True
             await self.play_background_audio(override_thinking=True, looping=True)
             return "Background music started."
         elif action.lower() == "stop":
             await self.stop_background_audio()
+            if self.thinking:
+                self.thinking.suppressed = False
             return "Background music stopped."
         else:
             return "Invalid action. Please use 'play' or 'stop'."
 
+    @function_tool
+    @hide_latency
+    async def check_order_status(self, order_id: str):
+        """
+        Looks up the shipping status of an order.
+        :param order_id: The order number given by the user.
+        """
+        # Simulated backend whose latency varies from call to call
+        await asyncio.sleep(random.uniform(0.2, 3.0))
+        return {"order_id": order_id, "status": "shipped", "eta_days": 2}
+
 async def entrypoint(ctx: JobContext):
     
     agent = VoiceAgent()
+    tts = OpenAITTS()
+    agent.thinking = ThinkingScheduler(agent, fillers=TTSAudioCache(tts))
+    # Pre-synthesize the filler phrases while the session starts
+    preload = asyncio.create_task(agent.thinking.preload())
+
+    async def cancel_preload() -> None:
+        preload.cancel()
+
+    ctx.add_shutdown_callback(cancel_preload)
 
     pipeline = Pipeline(
         stt=DeepgramSTT(),
         llm=OpenAILLM(),
-        tts=OpenAITTS(),
+        tts=tts,
         vad=SileroVAD(),
         turn_detector=TurnDetector()
     )
@@ -0,0 +1,186 @@
+import asyncio
+import bisect
+import logging
+import os
+import time
+from collections import deque
+from functools import wraps
+from typing import Deque, Dict, List, Optional, Sequence
+
+import videosdk.agents
+from videosdk.agents import Agent, TTSAudioCache
+
+logger = logging.getLogger(__name__)
+
+# The SDK's bundled keyboard sound, the same file set_thinking_audio() uses by default
+THINKING_AUDIO_FILE = os.path.join(os.path.dirname(videosdk.agents.__file__), "resources", "agent-keyboard.ogg")
+
+FILLER_PHRASES = (
+    "Let me check that for you.",
+    "One moment please.",
+    "Give me a second to look that up.",
+)
+
+# Log-spaced bucket upper bounds in seconds; the last bucket is open-ended
+BUCKET_BOUNDS = (0.05, 0.1, 0.2, 0.35, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0)
+
+
+class LatencyHistogram:
+    """Bucketed histogram over a tool's last `window` call durations.
+
+    Recording and quantile lookups cost O(number of buckets), independent of
+    the window size. Quantiles resolve to a bucket's upper bound, which errs on
+    the slow side.
+    """
+
+    def __init__(self, window: int = 50):
+        self._samples: Deque[int] = deque(maxlen=window)
+        self._counts: List[int] = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        if len(self._samples) == self._samples.maxlen:
+            self._counts[self._samples[0]] -= 1
+        bucket = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        self._samples.append(bucket)
+        self._counts[bucket] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        target = q * len(self._samples)
+        seen = 0
+        for bucket, count in enumerate(self._counts):
+            seen += count
+            if seen >= target and count:
+                return BUCKET_BOUNDS[bucket] if bucket < len(BUCKET_BOUNDS) else BUCKET_BOUNDS[-1] * 2
+        return BUCKET_BOUNDS[-1] * 2
+
+
+# Latency is a property of the tool and its backend, so histograms are shared by every session in the worker
+_histograms: Dict[str, LatencyHistogram] = {}
+
+
+def tool_histogram(name: str) -> LatencyHistogram:
+    return _histograms.setdefault(name, LatencyHistogram())
+
+
+class ThinkingScheduler:
+    """Covers tool calls with thinking audio or a filler phrase only when they are expected to be slow.
+
+    The expected wait is the `quantile` of the tool's recent latencies. At or
+    above `filler_threshold` a pre-synthesized filler phrase is spoken. At or
+    above `threshold` thinking audio starts straight away. Below it, thinking
+    audio is only started if the call is still running after `threshold`
+    seconds, so fast tools stay silent and cost no TTS. Until a tool has
+    `min_samples` calls recorded, `prior` stands in for its expected wait.
+    """
+
+    def __init__(
+        self,
+        agent: Agent,
+        fillers: Optional[TTSAudioCache] = None,
+        filler_phrases: Sequence[str] = FILLER_PHRASES,
+        threshold: float = 0.7,
+        filler_threshold: float = 2.0,
+        quantile: float = 0.75,
+        min_samples: int = 3,
+        prior: float = 1.0,
+        thinking_audio_file: str = THINKING_AUDIO_FILE,
+    ):
+        self.agent = agent
+        self.fillers = fillers
+        self.filler_phrases = list(filler_phrases)
+        self.threshold = threshold
+        self.filler_threshold = filler_threshold
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.prior = prior
+        self.thinking_audio_file = thinking_audio_file
+        # Set while other background audio (e.g. music) owns the background track
+        self.suppressed = False
+        self._active = 0
+        self._audio_playing = False
+        self._next_filler = 0
+
+    async def preload(self) -> None:
+        """Synthesize the filler phrases in the background so they are ready when needed."""
+        if self.fillers is None:
+            return
+        try:
+            await self.fillers.preload(self.filler_phrases)
+        except Exception as e:
+            logger.warning(f"Could not pre-synthesize filler phrases: {e}")
+
+    def expected_wait(self, tool: str) -> float:
+        histogram = tool_histogram(tool)
+        if len(histogram) < self.min_samples:
+            return self.prior
+        return histogram.quantile(self.quantile)
+
+    def _ready_filler(self) -> Optional[str]:
+        if self.fillers is None:
+            return None
+        for _ in range(len(self.filler_phrases)):
+            phrase = self.filler_phrases[self._next_filler % len(self.filler_phrases)]
+            self._next_filler += 1
+            if phrase in self.fillers:
+                return phrase
+        return None
+
+    async def _speak_filler(self, phrase: str) -> None:
+        audio = await self.fillers.fetch(phrase)
+        await self.agent.session.say(phrase, audio_data=audio, add_to_chat_context=False)
+
+    async def _start_audio(self, delay: float) -> None:
+        if delay:
+            await asyncio.sleep(delay)
+        if self.suppressed or self._audio_playing:
+            return
+        self._audio_playing = True
+        await self.agent.play_background_audio(
+            file=self.thinking_audio_file, volume=0.3, looping=True, override_thinking=True
+        )
+
+    async def _stop_audio(self) -> None:
+        if self._audio_playing and self._active == 0:
+            self._audio_playing = False
+            if not self.suppressed:
+                await self.agent.stop_background_audio()
+
+    async def run(self, tool: str, call):
+        """Await `call()`, covering the wait according to the tool's latency history."""
+        expected = self.expected_wait(tool)
+        cue: Optional[asyncio.Task] = None
+        phrase = self._ready_filler() if expected >= self.filler_threshold else None
+        if phrase is not None:
+            cue = asyncio.create_task(self._speak_filler(phrase))
+        elif not self.suppressed:
+            cue = asyncio.create_task(self._start_audio(0 if expected >= self.threshold else self.threshold))
+        logger.debug(f"{tool}: expected {expected:.2f}s, cue={'filler' if phrase else 'thinking audio'}")
+
+        self._active += 1
+        start = time.perf_counter()
+        try:
+            return await call()
+        finally:
+            tool_histogram(tool).record(time.perf_counter() - start)
+            self._active -= 1
+            if cue is not None and not cue.done() and phrase is None:
+                cue.cancel()
+            await self._stop_audio()
+
+
+def hide_latency(fn):
+    """Run a tool method through its agent's `thinking` scheduler; place it under `@function_tool`."""
+
+    @wraps(fn)
+    async def wrapper(self, *args, **kwargs):
+        scheduler: Optional[ThinkingScheduler] = getattr(self, "thinking", None)
+        if scheduler is None:
+            return await fn(self, *args, **kwargs)
+        return await scheduler.run(fn.__name__, lambda: fn(self, *args, **kwargs))
+
+    return wrapper
@@ -1,6 +1,9 @@
 import asyncio
-import aiohttp
 from videosdk.agents import Agent, AgentSession, Pipeline, function_tool, JobContext, RoomOptions, WorkerJob
+from http_client import attach_http_session, with_http_session
+from tool_runtime import SpeculativeOpenAIClient, ToolSpeculator, attach_tool_metrics, cached_tool, idempotent, traced_tool
+from tts_chunking import AdaptiveSentenceChunker
+from tts_phrase_cache import PersistentTTSCache
 from videosdk.plugins.openai import OpenAILLM
 from videosdk.plugins.deepgram import DeepgramSTT
 from videosdk.plugins.elevenlabs import ElevenLabsTTS
@@ -10,10 +13,28 @@ from videosdk.plugins.turn_detector import TurnDetector, pre_download_model
 # Pre-downloading the Turn Detector model
 pre_download_model()
 
+# Fixed prompts are rendered once and replayed from the on-disk phrase cache
+GREETING = "Hello, how can I help you today?"
+FAREWELL = "Goodbye!"
+
+
+def weather_cache_key(latitude: str, longitude: str):
+    # ~1 km grid: nearby estimates for the same city share a cache entry
+    try:
+        return round(float(latitude), 2), round(float(longitude), 2)
+    except ValueError:
+        return latitude.strip(), longitude.strip()
+
+
 @function_tool
+@idempotent
+@traced_tool(timeout=5)
+@cached_tool(ttl=300, key=weather_cache_key)
+@with_http_session
 async def get_weather(
     latitude: str,
     longitude: str,
+    http=None,
 ):
         """Called when the user asks about the weather. This function will return the weather for
         the given location. When given a location, please estimate the latitude and longitude of the
@@ -26,37 +47,40 @@ async def get_weather(
         print("###Getting weather for", latitude, longitude)
         url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&current=temperature_2m"
         weather_data = {}
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    print("###Weather data", data)
-                    weather_data = {
-                        "temperature": data["current"]["temperature_2m"],
-                        "temperature_unit": "Celsius",
-                    }
-                else:
-                    raise Exception(
-                        f"Failed to get weather data, status code: {response.status}"
-                    )
+        async with http.get(url) as response:
+            if response.status == 200:
+                data = await response.json()
+                print("###Weather data", data)
+                weather_data = {
+                    "temperature": data["current"]["temperature_2m"],
+                    "temperature_unit": "Celsius",
+                }
+            else:
+                raise Exception(
+                    f"Failed to get weather data, status code: {response.status}"
+                )
 
         return weather_data
 
 
 class MyVoiceAgent(Agent):
-    def __init__(self):
+    def __init__(self, phrases: PersistentTTSCache):
         super().__init__(
             instructions="You are VideoSDK's Voice Agent. You are a helpful voice assistant that can answer questions about weather, horoscopes and help with other tasks.",
             tools=[get_weather]
         )
+        self.phrases = phrases
 
     async def on_enter(self) -> None:
-        await self.session.say("Hello, how can I help you today?")
+        await self.phrases.say(self.session, GREETING)
 
     async def on_exit(self) -> None:
-        await self.session.say("Goodbye!")
+        await self.phrases.say(self.session, FAREWELL)
 
     @function_tool
+    @idempotent
+    @traced_tool(timeout=2)
+    @cached_tool(ttl=3600, key=lambda sign: sign.strip().title())
     async def get_horoscope(self, sign: str) -> dict:
         """Get today's horoscope for a given zodiac sign.
 
@@ -76,22 +100,37 @@ class MyVoiceAgent(Agent):
     @function_tool
     async def end_call(self) -> None:
         """End the call upon request by the user"""
-        await self.session.say("Goodbye!")
+        await self.phrases.say(self.session, FAREWELL)
         await asyncio.sleep(1)
         await self.session.leave()
 
 
 async def start_session(context: JobContext):
+    attach_tool_metrics(context)
+    attach_http_session(context)
+
+    tts = ElevenLabsTTS()
+    phrases = PersistentTTSCache(tts)
+    # Loads the greetings from disk (rendering them once per machine) while the session starts
+    asyncio.create_task(phrases.warm_up([GREETING, FAREWELL]))
+
+    agent = MyVoiceAgent(phrases)
 
-    agent = MyVoiceAgent()
+    # Short first clause for fast first audio, then whole sentences; thresholds come from the TTS profile
+    chunker = AdaptiveSentenceChunker.for_tts(tts)
 
     pipeline = Pipeline(
         stt=DeepgramSTT(),
-        llm=OpenAILLM(),
-        tts=ElevenLabsTTS(),
+        # Starts idempotent tools while the function call is still streaming and
+        # runs several calls from one turn concurrently (at most 4 at a time)
+        llm=OpenAILLM(client=SpeculativeOpenAIClient(ToolSpeculator(agent, max_concurrency=4))),
+        tts=tts,
         vad=SileroVAD(),
-        turn_detector=TurnDetector()
+        turn_detector=TurnDetector(),
+        chunker=chunker,
     )
+    # Logs first-byte latency per turn and a per-setting summary at shutdown
+    chunker.attach(pipeline, context)
 
     session = AgentSession(
         agent=agent,
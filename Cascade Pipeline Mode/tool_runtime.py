@@ -0,0 +1,513 @@
+import asyncio
+import copy
+import inspect
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from openai import AsyncOpenAI
+from opentelemetry.trace import StatusCode
+from videosdk.agents import Agent, JobContext, MetricsOptions, get_tool_info, is_function_tool
+from videosdk.agents.metrics.integration import complete_span, create_span
+
+from http_client import get_http_session
+
+logger = logging.getLogger(__name__)
+
+# Injected dependencies that never take part in a cache key
+_NON_KEY_PARAMS = ("self", "http")
+
+
+@dataclass
+class ToolCacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / calls if calls else 0.0
+
+
+class ToolCache:
+    """TTL + LRU cache of one tool's results with single-flight coalescing.
+
+    A cache is shared by every session in the worker. Concurrent calls with the
+    same key wait on one in-flight call instead of each starting their own, and
+    that call keeps running (and fills the cache) even if the caller that
+    started it is interrupted. Failures are never cached.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 256):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = ToolCacheStats()
+        self._store: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    async def get(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        entry = self._store.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._store.move_to_end(key)
+            self.stats.hits += 1
+            return copy.deepcopy(entry[1])
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats.misses += 1
+            task = asyncio.ensure_future(self._fetch(key, call))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+        else:
+            self.stats.coalesced += 1
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _fetch(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        result = await call()
+        self._store[key] = (time.monotonic() + self.ttl, result)
+        self._store.move_to_end(key)
+        while len(self._store) > self.max_entries:
+            self._store.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        self._store.clear()
+
+
+_caches: Dict[str, ToolCache] = {}
+
+
+def _key_builder(signature: inspect.Signature, key: Optional[Callable[..., Hashable]]) -> Callable[..., Hashable]:
+    def build(*args, **kwargs) -> Hashable:
+        bound = signature.bind_partial(*args, **kwargs)
+        arguments = {name: value for name, value in bound.arguments.items() if name not in _NON_KEY_PARAMS}
+        if key is not None:
+            return key(**arguments)
+        return tuple((name, repr(value)) for name, value in sorted(arguments.items()))
+
+    return build
+
+
+def cached_tool(ttl: float = 60.0, key: Optional[Callable[..., Hashable]] = None, max_entries: int = 256):
+    """Cache a tool's results worker-wide; place it directly under `@function_tool`.
+
+    `key` receives the tool's arguments (without `self` and `http`) and returns
+    a hashable cache key; by default every argument is part of the key. Use it
+    to normalise arguments, e.g. rounding coordinates or lowercasing a name.
+    """
+
+    def decorator(fn):
+        make_key = _key_builder(inspect.signature(fn), key)
+        cache = _caches.setdefault(fn.__qualname__, ToolCache(fn.__name__, ttl, max_entries))
+
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await cache.get(make_key(*args, **kwargs), lambda: fn(*args, **kwargs))
+
+        wrapper.tool_cache = cache
+        return wrapper
+
+    return decorator
+
+
+@dataclass
+class SpeculationStats:
+    started: int = 0
+    joined: int = 0
+    wasted: int = 0
+    parallel: int = 0
+
+
+speculation_stats = SpeculationStats()
+
+# How long a finished early result waits for the committed call to claim it
+SPECULATION_HOLD_SECONDS = 10.0
+
+_speculating: ContextVar[bool] = ContextVar("speculating", default=False)
+# The session whose LLM stream is being read; its committed tool calls run in the same task
+_active_speculator: ContextVar[Optional["ToolSpeculator"]] = ContextVar("active_speculator", default=None)
+
+
+def _call_key(signature: inspect.Signature, name: str, args: tuple, kwargs: dict) -> Tuple[str, str]:
+    bound = signature.bind_partial(*args, **kwargs)
+    arguments = {k: v for k, v in bound.arguments.items() if k not in _NON_KEY_PARAMS}
+    return name, json.dumps(arguments, sort_keys=True, default=str)
+
+
+def _joinable(fn, idempotent: bool):
+    signature = inspect.signature(fn)
+
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        speculator = _active_speculator.get()
+        if _speculating.get() or speculator is None:
+            return await fn(*args, **kwargs)
+
+        task = speculator._claim(_call_key(signature, fn.__qualname__, args, kwargs))
+        if task is not None and not task.cancelled():
+            try:
+                result = await asyncio.shield(task)
+                speculation_stats.joined += 1
+                return result
+            except Exception as e:
+                if not idempotent:
+                    raise
+                logger.debug(f"Speculative {fn.__name__} failed, running it again: {e}")
+        return await fn(*args, **kwargs)
+
+    wrapper.idempotent = idempotent
+    wrapper.parallel_safe = True
+    return wrapper
+
+
+def idempotent(fn):
+    """Mark a tool as safe to start before the LLM commits the call; place it under `@function_tool`.
+
+    A `ToolSpeculator` starts such tools while the function call is still
+    streaming. When the committed call arrives with the same arguments it
+    joins the running speculation instead of starting over. If the speculation
+    failed, the call simply runs again. Idempotent tools are also parallel-safe.
+    """
+    return _joinable(fn, idempotent=True)
+
+
+def parallel_safe(fn):
+    """Mark a tool as safe to run alongside the other calls of the same LLM turn.
+
+    Once the model has emitted all of a turn's function calls, a
+    `ToolSpeculator` starts every parallel-safe call at once; the pipeline's
+    in-order execution then collects the results in the original order. An
+    early result is only handed to a call from the session that started it,
+    so side effects are never shared between sessions. Don't use it for tools
+    whose side effects must follow the previous call (e.g. ending the call).
+    """
+    return _joinable(fn, idempotent=False)
+
+
+def traced_tool(timeout: Optional[float] = None):
+    """Run a tool inside a trace span, giving up after `timeout` seconds.
+
+    On timeout the LLM gets an error result instead of the turn stalling. The
+    span records whether the call ran speculatively, so concurrent calls show
+    up as overlapping spans.
+    """
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            _, arguments = _call_key(signature, fn.__name__, args, kwargs)
+            start = time.perf_counter()
+            span = create_span(
+                f"Tool: {fn.__name__}",
+                {"tool": fn.__name__, "arguments": arguments, "early_start": _speculating.get()},
+                start_time=start,
+            )
+            try:
+                result = await asyncio.wait_for(fn(*args, **kwargs), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Tool {fn.__name__} timed out after {timeout}s")
+                complete_span(span, StatusCode.ERROR, f"timed out after {timeout}s", end_time=time.perf_counter())
+                return {"error": f"{fn.__name__} did not respond within {timeout} seconds"}
+            except Exception as e:
+                complete_span(span, StatusCode.ERROR, str(e), end_time=time.perf_counter())
+                raise
+            complete_span(span, StatusCode.OK, end_time=time.perf_counter())
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class ToolSpeculator:
+    """Starts tool calls early from the LLM's streamed function calls.
+
+    Fed with the tool-call deltas of an LLM response stream (see
+    `SpeculativeOpenAIClient`):
+
+    - `@idempotent` tools start as soon as their arguments are complete JSON.
+      Arguments are re-parsed only when the buffer ends with `}`, so the check
+      is cheap even for long argument strings.
+    - When the model finishes emitting the turn's calls, every remaining
+      `@parallel_safe` call starts at once.
+
+    At most `max_concurrency` early calls run at a time. Create one per session:
+    early results are only joined by calls from the same session's LLM stream.
+    """
+
+    def __init__(self, agent: Agent, max_concurrency: int = 4):
+        self.agent = agent
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._calls: Dict[int, Dict[str, Any]] = {}
+        self._speculations: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def reset(self) -> None:
+        self._calls.clear()
+
+    def _parse(self, call: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not call["name"] or not call["arguments"].rstrip().endswith("}"):
+            return None
+        try:
+            arguments = json.loads(call["arguments"])
+        except ValueError:
+            return None
+        return arguments if isinstance(arguments, dict) else None
+
+    def feed(self, index: int, name: Optional[str], fragment: Optional[str]) -> None:
+        call = self._calls.setdefault(index, {"name": "", "arguments": "", "started": False})
+        if name and not call["name"]:
+            call["name"] = name
+        if fragment:
+            call["arguments"] += fragment
+        if call["started"]:
+            return
+        arguments = self._parse(call)
+        if arguments is not None:
+            call["started"] = self._start(call["name"], arguments, "idempotent")
+
+    def commit(self) -> None:
+        """The model has emitted all of this response's calls; start the parallel-safe ones."""
+        if len(self._calls) < 2:
+            return
+        for _, call in sorted(self._calls.items()):
+            if call["started"]:
+                continue
+            arguments = self._parse(call)
+            if arguments is not None and self._start(call["name"], arguments, "parallel_safe"):
+                call["started"] = True
+                speculation_stats.parallel += 1
+
+    def _start(self, name: str, arguments: Dict[str, Any], marker: str) -> bool:
+        tool = next((t for t in self.agent.tools if is_function_tool(t) and get_tool_info(t).name == name), None)
+        if tool is None or not getattr(tool, marker, False):
+            return False
+        signature = inspect.signature(tool)
+        kwargs = {k: v for k, v in arguments.items() if k in signature.parameters and k not in _NON_KEY_PARAMS}
+        try:
+            signature.bind(**kwargs)
+        except TypeError:
+            return False
+        key = _call_key(signature, tool.__qualname__, (), kwargs)
+        if key in self._speculations:
+            return True
+        token = _speculating.set(True)
+        try:
+            task = asyncio.ensure_future(self._run(tool, kwargs))
+        finally:
+            _speculating.reset(token)
+        self._speculations[key] = task
+        loop = asyncio.get_running_loop()
+        side_effects = not getattr(tool, "idempotent", False)
+        task.add_done_callback(lambda t: loop.call_later(SPECULATION_HOLD_SECONDS, self._expire, key, t, side_effects))
+        speculation_stats.started += 1
+        logger.debug(f"Started {name}({kwargs}) early ({marker})")
+        return True
+
+    async def _run(self, tool, kwargs: Dict[str, Any]) -> Any:
+        async with self._semaphore:
+            return await tool(**kwargs)
+
+    def _claim(self, key: Tuple[str, str]) -> Optional[asyncio.Task]:
+        return self._speculations.pop(key, None)
+
+    def _expire(self, key: Tuple[str, str], task: asyncio.Task, side_effects: bool) -> None:
+        if self._speculations.get(key) is task:
+            del self._speculations[key]
+            speculation_stats.wasted += 1
+            if side_effects:
+                logger.warning(f"Parallel-safe call {key[0]}({key[1]}) ran early but was never claimed by this session")
+        if not task.cancelled():
+            task.exception()
+
+
+class _SpeculativeStream:
+    def __init__(self, stream, speculator: ToolSpeculator):
+        self._stream = stream
+        self._speculator = speculator
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        _active_speculator.set(self._speculator)
+        self._speculator.reset()
+        async for chunk in self._stream:
+            if chunk.choices:
+                choice = chunk.choices[0]
+                for tc in choice.delta.tool_calls or ():
+                    function = tc.function
+                    self._speculator.feed(tc.index, function and function.name, function and function.arguments)
+                if choice.finish_reason == "tool_calls":
+                    self._speculator.commit()
+            yield chunk
+        self._speculator.commit()
+
+    async def close(self) -> None:
+        await self._stream.close()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _SpeculativeCompletions:
+    def __init__(self, completions, speculator: ToolSpeculator):
+        self._completions = completions
+        self._speculator = speculator
+
+    async def create(self, **params):
+        stream = await self._completions.create(**params)
+        return _SpeculativeStream(stream, self._speculator) if params.get("stream") else stream
+
+    def __getattr__(self, name):
+        return getattr(self._completions, name)
+
+
+class _SpeculativeChat:
+    def __init__(self, chat, speculator: ToolSpeculator):
+        self.completions = _SpeculativeCompletions(chat.completions, speculator)
+        self._chat = chat
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+
+_openai_client: Optional[AsyncOpenAI] = None
+
+
+class SpeculativeOpenAIClient:
+    """`AsyncOpenAI` stand-in that lets a `ToolSpeculator` watch streamed tool calls.
+
+    Pass it as `OpenAILLM(client=...)`. Everything but streamed chat completions
+    is delegated to the wrapped client, which defaults to one pooled client per
+    worker.
+    """
+
+    def __init__(self, speculator: ToolSpeculator, client: Optional[AsyncOpenAI] = None):
+        global _openai_client
+        if client is None:
+            if _openai_client is None:
+                _openai_client = AsyncOpenAI()
+            client = _openai_client
+        self._client = client
+        self.chat = _SpeculativeChat(client.chat, speculator)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def tool_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {cache.name: {**asdict(cache.stats), "entries": len(cache)} for cache in _caches.values()}
+
+
+def resolve_metrics_options(ctx: JobContext) -> Optional[MetricsOptions]:
+    options = ctx.room_options
+    if options is None:
+        return None
+    if options.observability is not None and options.observability.metrics is not None:
+        return options.observability.metrics
+    return options.metrics
+
+
+class ToolMetricsExporter:
+    """Periodically POSTs tool-cache and speculation counters to `MetricsOptions.export_url`.
+
+    One exporter runs per worker. Each report carries the counts since the
+    previous report, so a collector can sum reports from many workers.
+    Without an export URL the totals are only logged.
+    """
+
+    def __init__(self, options: Optional[MetricsOptions], interval: float = 30.0):
+        self.options = options
+        self.interval = interval
+        self._reported: Dict[str, Dict[str, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def export_url(self) -> Optional[str]:
+        if self.options is None or not self.options.enabled:
+            return None
+        return self.options.export_url
+
+    def start(self) -> None:
+        if self.export_url and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.export()
+        logger.info(f"Tool cache stats: {tool_cache_stats()}, speculation: {asdict(speculation_stats)}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.export()
+
+    def _deltas(self) -> List[Dict[str, Any]]:
+        records = []
+        for name, stats in tool_cache_stats().items():
+            previous = self._reported.get(name, {})
+            delta = {k: stats[k] - previous.get(k, 0) for k in ("hits", "misses", "coalesced")}
+            self._reported[name] = {k: stats[k] for k in ("hits", "misses", "coalesced")}
+            if any(delta.values()):
+                records.append({"type": "tool_cache", "tool": name, **delta, "entries": stats["entries"]})
+        stats = asdict(speculation_stats)
+        previous = self._reported.get("speculation", {})
+        delta = {k: v - previous.get(k, 0) for k, v in stats.items()}
+        self._reported["speculation"] = stats
+        if any(delta.values()):
+            records.append({"type": "tool_speculation", **delta})
+        return records
+
+    async def export(self) -> None:
+        if not self.export_url:
+            return
+        records = self._deltas()
+        if not records:
+            return
+        headers = {"Content-Type": "application/json", **(self.options.export_headers or {})}
+        try:
+            async with get_http_session().post(self.export_url, json={"data": records}, headers=headers) as response:
+                if response.status >= 300:
+                    logger.warning(f"Tool metrics export failed: HTTP {response.status}")
+        except Exception as e:
+            logger.warning(f"Tool metrics export failed: {e}")
+
+
+_exporter: Optional[ToolMetricsExporter] = None
+_jobs = 0
+
+
+def attach_tool_metrics(ctx: JobContext, interval: float = 30.0) -> None:
+    """Export tool runtime metrics through the job's `MetricsOptions` while any job runs.
+
+    Call it before `attach_http_session` so the final report is sent while the
+    pooled session is still open (shutdown callbacks run in registration order).
+    """
+    global _exporter, _jobs
+    _jobs += 1
+    if _exporter is None:
+        _exporter = ToolMetricsExporter(resolve_metrics_options(ctx), interval)
+    _exporter.start()
+
+    async def release() -> None:
+        global _exporter, _jobs
+        _jobs -= 1
+        if _jobs == 0 and _exporter is not None:
+            await _exporter.stop()
+            _exporter = None
+
+    ctx.add_shutdown_callback(release)
@@ -0,0 +1,185 @@
+import logging
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Deque, Dict, List, Optional
+
+from videosdk.agents import JobContext, Pipeline
+from videosdk.agents.tokenize import STRONG_TERMINATORS, BasicSentenceChunker, BufferedSentenceChunkStream, SentenceChunker
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ChunkingProfile:
+    # A clause terminator (, ; :) ends the first chunk once it is this long
+    first_min_chars: int = 15
+    # With no terminator yet, the first chunk is cut at a word boundary here
+    first_max_chars: int = 50
+    # Later chunks are whole sentences, split at clauses only past this length
+    sentence_min_chars: int = 80
+
+    def describe(self) -> str:
+        return f"first={self.first_min_chars}-{self.first_max_chars} sentence={self.sentence_min_chars}"
+
+
+# Starting points per TTS plugin; tune them with the first-byte report logged at shutdown.
+# Cartesia streams and keeps good prosody on short input, ElevenLabs needs a little more
+# context per request, and Google synthesizes each chunk as a separate request.
+TTS_PROFILES: Dict[str, ChunkingProfile] = {
+    "CartesiaTTS": ChunkingProfile(first_min_chars=10, first_max_chars=40, sentence_min_chars=60),
+    "ElevenLabsTTS": ChunkingProfile(first_min_chars=20, first_max_chars=60, sentence_min_chars=100),
+    "GoogleTTS": ChunkingProfile(first_min_chars=30, first_max_chars=80, sentence_min_chars=150),
+}
+DEFAULT_PROFILE = ChunkingProfile()
+
+
+def profile_for(tts: Any) -> ChunkingProfile:
+    return TTS_PROFILES.get(type(tts).__name__, DEFAULT_PROFILE)
+
+
+@dataclass
+class FirstByteStats:
+    first_chunk_chars: Deque[int] = field(default_factory=lambda: deque(maxlen=200))
+    first_chunk_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+    first_byte_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+
+    def summary(self) -> str:
+        if not self.first_byte_ms:
+            return "no turns measured"
+        return (
+            f"{len(self.first_byte_ms)} turns, median first chunk {statistics.median(self.first_chunk_chars):.0f} chars "
+            f"after {statistics.median(self.first_chunk_ms):.0f} ms, "
+            f"median first audio byte {statistics.median(self.first_byte_ms):.0f} ms after the first LLM text"
+        )
+
+
+# Worker-wide, keyed by TTS plugin and profile so different settings can be compared
+first_byte_stats: Dict[str, FirstByteStats] = {}
+
+
+class AdaptiveChunkStream(BufferedSentenceChunkStream):
+    """Emits a short first clause as soon as it is complete, then whole sentences."""
+
+    def __init__(self, chunker: "AdaptiveSentenceChunker", language: Optional[str]):
+        super().__init__(
+            tokenize_fn=self._tokenize,
+            strong_terminators=STRONG_TERMINATORS,
+            min_sentence_len=chunker.profile.first_min_chars,
+        )
+        self._profile = chunker.profile
+        self._first_fn = partial(chunker._first.tokenize_raw, language=language)
+        self._sentence_fn = partial(chunker._sentences.tokenize_raw, language=language)
+        self._first_done = False
+        # The first chunk was cut mid-sentence; the rest of that sentence is still buffered
+        self._cut_tail = False
+        self.first_text_at: Optional[float] = None
+        self.first_chunk_at: Optional[float] = None
+        self.first_chunk_chars = 0
+        self.reported = False
+
+    def _tokenize(self, text: str) -> List[str]:
+        if self._first_done:
+            return self._sentences(text)
+        segments = self._first_fn(text)
+        if len(segments) < 2 and len(text) >= self._profile.first_max_chars:
+            # No clause boundary yet: cut at the last word boundary within the limit
+            cut = text.rfind(" ", 0, self._profile.first_max_chars)
+            if cut > 0 and text[:cut].strip():
+                segments = [text[:cut], text[cut:]]
+                self._cut_tail = True
+        if len(segments) < 2:
+            return segments
+        self._first_done = True
+        return [segments[0]] + (self._sentences("".join(segments[1:])) or [""])
+
+    def _sentences(self, text: str) -> List[str]:
+        segments = self._sentence_fn(text)
+        if not self._cut_tail:
+            return segments
+        # Keep the rest of a cut sentence with the next one instead of speaking it alone
+        if len(segments) < 3:
+            return ["".join(segments)] if segments else segments
+        self._cut_tail = False
+        return ["".join(segments[:2])] + segments[2:]
+
+    async def push_text(self, text: str) -> None:
+        if self.first_text_at is None and text:
+            self.first_text_at = time.perf_counter()
+        await super().push_text(text)
+
+    async def __anext__(self) -> str:
+        segment = await super().__anext__()
+        if self.first_chunk_at is None:
+            # Also covers a first chunk released by the idle flush
+            self._first_done = True
+            self.first_chunk_at = time.perf_counter()
+            self.first_chunk_chars = len(segment)
+        return segment
+
+
+class AdaptiveSentenceChunker(SentenceChunker):
+    """Sentence chunker for `Pipeline(chunker=...)` that trades chunk size for time-to-first-audio.
+
+    The first chunk of each response ends at the first clause terminator
+    after `first_min_chars`, or at a word boundary at `first_max_chars`, so
+    TTS can start on a few words. Every later chunk is a full sentence
+    (clauses are split off only past `sentence_min_chars`), which keeps
+    prosody natural once audio is already playing. Call `attach` to log the
+    first-byte latency of each turn under this profile.
+    """
+
+    def __init__(self, profile: ChunkingProfile = DEFAULT_PROFILE, name: str = "default", language: str = "auto"):
+        self.profile = profile
+        self.name = name
+        self._first = BasicSentenceChunker(language=language, min_sentence_len=profile.first_min_chars)
+        self._sentences = BasicSentenceChunker(language=language, min_sentence_len=profile.sentence_min_chars)
+        self._stream: Optional[AdaptiveChunkStream] = None
+
+    @classmethod
+    def for_tts(cls, tts: Any, profile: Optional[ChunkingProfile] = None, language: str = "auto") -> "AdaptiveSentenceChunker":
+        return cls(profile or profile_for(tts), name=type(tts).__name__, language=language)
+
+    @property
+    def setting(self) -> str:
+        return f"{self.name} {self.profile.describe()}"
+
+    def tokenize(self, text: str, *, language: Optional[str] = None) -> List[str]:
+        return self._sentences.tokenize(text, language=language)
+
+    def stream(self, *, language: Optional[str] = None) -> AdaptiveChunkStream:
+        self._stream = AdaptiveChunkStream(self, language)
+        return self._stream
+
+    def attach(self, pipeline: Pipeline, ctx: Optional[JobContext] = None) -> None:
+        """Record first-byte latency from the pipeline's TTS metrics; log the report when `ctx` shuts down."""
+        pipeline.metrics.on("tts")(self._on_tts_metrics)
+        if ctx is not None:
+            ctx.add_shutdown_callback(log_first_byte_report)
+
+    def _on_tts_metrics(self, metrics: Dict[str, Any]) -> None:
+        stream = self._stream
+        first_byte_at = metrics.get("tts_first_byte_time")
+        if stream is None or stream.reported or stream.first_chunk_at is None or first_byte_at is None:
+            return
+        if first_byte_at < stream.first_text_at:
+            # Audio from an earlier utterance, e.g. session.say()
+            return
+        stream.reported = True
+        first_chunk_ms = (stream.first_chunk_at - stream.first_text_at) * 1000
+        first_byte_ms = (first_byte_at - stream.first_text_at) * 1000
+        stats = first_byte_stats.setdefault(self.setting, FirstByteStats())
+        stats.first_chunk_chars.append(stream.first_chunk_chars)
+        stats.first_chunk_ms.append(first_chunk_ms)
+        stats.first_byte_ms.append(first_byte_ms)
+        logger.info(
+            f"[chunking] {self.setting}: first chunk {stream.first_chunk_chars} chars after {first_chunk_ms:.0f} ms, "
+            f"first audio byte after {first_byte_ms:.0f} ms"
+        )
+
+
+async def log_first_byte_report() -> None:
+    for setting, stats in first_byte_stats.items():
+        logger.info(f"[chunking] {setting}: {stats.summary()}")
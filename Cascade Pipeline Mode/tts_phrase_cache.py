@@ -0,0 +1,212 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+from videosdk.agents import AgentSession, TTSAudioCache, UtteranceHandle
+
+logger = logging.getLogger(__name__)
+
+# Shared by every worker process on the machine; point it at a shared volume to share across machines
+DEFAULT_CACHE_DIR = os.environ.get(
+    "TTS_PHRASE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "videosdk-agents", "tts")
+)
+# Limits for the whole cache directory, enforced by `prune`
+DEFAULT_MAX_BYTES = int(float(os.environ.get("TTS_PHRASE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+DEFAULT_MAX_AGE = float(os.environ.get("TTS_PHRASE_CACHE_MAX_AGE_DAYS", "30")) * 86400
+
+# Temp files older than this were left behind by a writer that died
+_STALE_TMP_SECONDS = 3600
+
+# Attributes that change the synthesized audio, where a TTS plugin has them
+_FINGERPRINT_ATTRS = ("voice", "_voice", "voice_id", "voice_config", "voice_settings", "model", "language", "speed")
+
+
+def tts_fingerprint(tts: Any) -> Dict[str, str]:
+    """Describe what a TTS instance would render: provider, voice, model and output format."""
+    fingerprint = {
+        "provider": type(tts).__name__,
+        "sample_rate": str(getattr(tts, "sample_rate", "")),
+        "num_channels": str(getattr(tts, "num_channels", "")),
+    }
+    for attr in _FINGERPRINT_ATTRS:
+        value = getattr(tts, attr, None)
+        if value is not None:
+            text = repr(value)
+            # Objects without a stable repr only contribute their type
+            fingerprint[attr] = type(value).__name__ if " at 0x" in text else text
+    return fingerprint
+
+
+def _read(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            audio = f.read()
+    except FileNotFoundError:
+        return None
+    # Mark it as recently used, so pruning removes the least recently used entries first
+    with contextlib.suppress(OSError):
+        os.utime(path)
+    return audio
+
+
+def _write_atomic(path: str, audio: bytes) -> None:
+    # Write to a temp file and rename, so other processes never read a partial file
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def prune_cache_dir(cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, max_age: float = DEFAULT_MAX_AGE) -> int:
+    """Delete entries unused for `max_age` seconds, then the least recently used until the directory fits `max_bytes`.
+
+    Safe to run while other processes use the directory: a reader that loses
+    an entry just renders it again. Returns the number of entries removed.
+    """
+    now = time.time()
+    entries = []
+    for root, _, names in os.walk(cache_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # removed by another process meanwhile
+            if name.endswith(".pcm"):
+                entries.append((stat.st_mtime, stat.st_size, path))
+            elif name.endswith(".tmp") and now - stat.st_mtime > _STALE_TMP_SECONDS:
+                with contextlib.suppress(OSError):
+                    os.unlink(path)
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in entries:
+        if total <= max_bytes and now - mtime <= max_age:
+            break  # oldest first, so every remaining entry is newer
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+@dataclass
+class PhraseCacheStats:
+    fetches: int = 0
+    disk_hits: int = 0
+    synthesized: int = 0
+
+    def summary(self) -> str:
+        memory_hits = self.fetches - self.disk_hits - self.synthesized
+        return f"{self.fetches} fetches, {memory_hits} memory hits, {self.disk_hits} disk hits, {self.synthesized} synthesized"
+
+
+class PersistentTTSCache:
+    """A `TTSAudioCache` with a content-addressed directory on disk behind it.
+
+    Audio is keyed by the TTS fingerprint (provider, voice, model, output
+    format) and the phrase text. A phrase is synthesized once per machine,
+    not once per call or per process: a miss in the in-memory `TTSAudioCache`
+    is looked up on disk before `TTSAudioCache.fetch` renders it, and new
+    renders are written atomically, so worker processes can share the
+    directory. The directory is pruned to `max_bytes` and `max_age` by
+    `prune`, which `warm_up` runs first. Use it for fixed prompts such as
+    greetings; `warm_up` renders a list of phrases ahead of the first call.
+    """
+
+    def __init__(
+        self,
+        tts: Any,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_entries: int = 128,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        # In-process tier; it also renders misses, one request per phrase at a time
+        self.memory = TTSAudioCache(tts, max_entries=max_entries)
+        self.fingerprint = tts_fingerprint(tts)
+        self._fingerprint_key = json.dumps(self.fingerprint, sort_keys=True)
+        self.cache_dir = cache_dir
+        self._dir = os.path.join(cache_dir, self.fingerprint["provider"])
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = PhraseCacheStats()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def path_for(self, text: str, voice_id: Optional[str] = None) -> str:
+        digest = hashlib.sha256(f"{self._fingerprint_key}::{voice_id or ''}::{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self._dir, f"{digest}.pcm")
+
+    def __contains__(self, text: str) -> bool:
+        return text in self.memory or os.path.exists(self.path_for(text))
+
+    async def fetch(self, text: str, *, voice_id: Optional[str] = None) -> bytes:
+        """Return the audio for `text` from memory or disk, rendering and persisting it on a miss."""
+        self.stats.fetches += 1
+        if voice_id is None and text in self.memory:
+            return await self.memory.fetch(text)
+        path = self.path_for(text, voice_id)
+        async with self._locks.setdefault(path, asyncio.Lock()):
+            audio = await asyncio.to_thread(_read, path)
+            if audio:
+                self.stats.disk_hits += 1
+                return audio
+            audio = await self.memory.fetch(text, voice_id=voice_id)
+            if audio:
+                self.stats.synthesized += 1
+                try:
+                    await asyncio.to_thread(_write_atomic, path, audio)
+                except OSError as e:
+                    logger.warning(f"Could not persist TTS audio for {text!r}: {e}")
+            return audio
+
+    async def prune(self) -> int:
+        """Apply `max_bytes` and `max_age` to the cache directory; returns the number of entries removed."""
+        removed = await asyncio.to_thread(prune_cache_dir, self.cache_dir, self.max_bytes, self.max_age)
+        if removed:
+            logger.info(f"Pruned {removed} entries from the TTS phrase cache in {self.cache_dir}")
+        return removed
+
+    async def warm_up(self, phrases: Iterable[str], *, voice_id: Optional[str] = None, concurrency: int = 4) -> None:
+        """Prune the cache, then load or render `phrases` so their first use plays instantly; failures are logged, not raised."""
+        try:
+            await self.prune()
+        except OSError as e:
+            logger.warning(f"Could not prune the TTS phrase cache: {e}")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def render(phrase: str) -> None:
+            async with semaphore:
+                try:
+                    await self.fetch(phrase, voice_id=voice_id)
+                except Exception as e:
+                    logger.warning(f"Could not warm up TTS phrase {phrase!r}: {e}")
+
+        await asyncio.gather(*(render(phrase) for phrase in dict.fromkeys(phrases)))
+        logger.info(f"TTS phrase cache warmed up: {self.stats.summary()}")
+
+    async def say(self, session: AgentSession, text: str, **kwargs: Any) -> UtteranceHandle:
+        """`session.say(text)` with cached audio, falling back to live TTS if the phrase cannot be fetched."""
+        try:
+            audio = await self.fetch(text)
+        except Exception as e:
+            logger.warning(f"TTS phrase cache unavailable for {text!r}, synthesizing live: {e}")
+            return await session.say(text, **kwargs)
+        if not audio:
+            return await session.say(text, **kwargs)
+        return await session.say(text, audio_data=audio, **kwargs)
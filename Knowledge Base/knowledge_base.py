@@ -1,52 +1,188 @@
+import asyncio
+import copy
 import logging
 import os
-from typing import List
-from videosdk.agents import Agent, AgentSession, Pipeline, JobContext, RoomOptions, WorkerJob, KnowledgeBase, KnowledgeBaseConfig
+from typing import List, Optional
+from videosdk.agents import Agent, AgentSession, Pipeline, JobContext, RoomOptions, WorkerJob, KnowledgeBase, KnowledgeBaseConfig, STTResponse, SpeechEventType, run_stt
+from videosdk.agents.metrics import MetricsCollector, TurnMetrics, metrics_collector, set_current_metrics_collector
 from videosdk.plugins.google import GoogleLLM, GoogleTTS
 from videosdk.plugins.sarvamai import SarvamAISTT
 from videosdk.plugins.silero import SileroVAD
 from videosdk.plugins.turn_detector import TurnDetector, pre_download_model
+from retrieval_gate import RetrievalGate
+from trigger_matcher import DEFAULT_TENANT, TriggerMatch, get_matcher
 import logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", handlers=[logging.StreamHandler()])
 pre_download_model()
 
+def _same_query(a: Optional[str], b: Optional[str]) -> bool:
+    return a is not None and b is not None and " ".join(a.lower().split()) == " ".join(b.lower().split())
+
 class CustomKnowledgeBase(KnowledgeBase):
     """
     Custom knowledge base handler to demonstrate overriding retrieval logic.
+
+    Retrieval is prefetched as soon as the STT produces a final transcript,
+    i.e. while the turn detector is still waiting for end of utterance, and
+    cancelled if the user keeps talking. `process_query` reuses the prefetch
+    when its query matches the final one. A prefetch runs the base class
+    `retrieve_documents` on a copy of the knowledge base, against a detached
+    metrics collector, and holds back unanswered-question reports, so nothing
+    is recorded for the session until `process_query` uses the result.
     """
 
+    # Used for tenants without an entry in the TRIGGER_PHRASES_FILE JSON
     TRIGGER_PHRASES = ["search for", "look up", "what do you know about"]
 
+    def __init__(self, config: KnowledgeBaseConfig, tenant: str = DEFAULT_TENANT):
+        super().__init__(config)
+        # Compiled once per worker and tenant, shared by every session
+        self.triggers = get_matcher(tenant, self.TRIGGER_PHRASES)
+        self._last_match: tuple = (None, None)
+        # One gate per knowledge base, i.e. per agent session, so its stats are per session
+        self.gate = RetrievalGate(trigger=lambda transcript: self.find_trigger(transcript) is not None)
+        self._segments: List[str] = []
+        self._prefetch_query: Optional[str] = None
+        self._prefetch_task: Optional[asyncio.Task] = None
+        # Set on the copies prefetches run on
+        self.holding_reports = False
+        self.held_unanswered = False
+
+    def on_speech_event(self, event: STTResponse) -> None:
+        """
+        Feed STT events in from a pipeline `stt` hook.
+        """
+        text = event.data.text.strip() if event.data and event.data.text else ""
+        if event.event_type == SpeechEventType.FINAL and text:
+            # The pipeline joins the final segments of a turn the same way
+            self._segments.append(text)
+            self.prefetch(" ".join(self._segments))
+        elif event.event_type == SpeechEventType.START or (event.event_type == SpeechEventType.INTERIM and text):
+            # The user kept talking, so the prefetched query is stale
+            self.cancel_prefetch()
+
+    def prefetch(self, transcript: str) -> None:
+        """
+        Start retrieving for `transcript` in the background.
+        """
+        if not self.gate.evaluate(transcript).retrieve:
+            return
+        query = self.pre_process_query(transcript)
+        if self._prefetch_task is not None and _same_query(query, self._prefetch_query):
+            return
+        self.cancel_prefetch()
+        self._prefetch_query = query
+        self._prefetch_task = asyncio.create_task(self._speculate(query))
+
+    async def _speculate(self, query: str) -> tuple:
+        # Retrieval state lands on the copy, and metrics on a collector no one reports;
+        # the task runs in its own context, so the session's collector is untouched
+        shadow = copy.copy(self)
+        shadow.holding_reports, shadow.held_unanswered = True, False
+        detached = MetricsCollector()
+        detached.current_turn = TurnMetrics()
+        set_current_metrics_collector(detached)
+        documents = await KnowledgeBase.retrieve_documents(shadow, query)
+        return documents, shadow, detached.current_turn.kb_metrics
+
+    def cancel_prefetch(self) -> None:
+        # Safe at any point: a prefetch records nothing for the session until it is used
+        if self._prefetch_task is not None and not self._prefetch_task.done():
+            self._prefetch_task.cancel()
+        self._prefetch_task, self._prefetch_query = None, None
+
+    async def process_query(self, transcript: str) -> Optional[str]:
+        """
+        Same flow as the base class, but reuses a matching prefetch instead of
+        retrieving again.
+        """
+        self._segments.clear()
+        if not self.allow_retrieval(transcript):
+            self.cancel_prefetch()
+            return None
+
+        query = self.pre_process_query(transcript)
+        if self._prefetch_task is not None and _same_query(query, self._prefetch_query):
+            task = self._prefetch_task
+            self._prefetch_task, self._prefetch_query = None, None
+            logger.debug(f"Using prefetched retrieval for '{query}' ({'ready' if task.done() else 'in flight'})")
+            documents = await self._use_prefetch(query, task)
+        else:
+            self.cancel_prefetch()
+            documents = await self.retrieve_documents(query)
+
+        return self.format_context(documents) if documents else None
+
+    async def _use_prefetch(self, query: str, task: asyncio.Task) -> List[str]:
+        """
+        Record a prefetched retrieval as if it ran now: the KB metric covers
+        the time this turn waited for it, and a held-back unanswered question
+        is filed against the documents the prefetch searched.
+        """
+        metrics_collector.on_knowledge_base_start(kb_id=",".join(self.config.knowledge_ids))
+        documents, shadow, kb_metrics = [], None, []
+        try:
+            documents, shadow, kb_metrics = await task
+        finally:
+            # Close the metric even if the turn is interrupted while waiting
+            kb = kb_metrics[-1] if kb_metrics else None
+            metrics_collector.on_knowledge_base_complete(
+                documents=documents,
+                scores=kb.kb_scores if kb else [],
+                retrievals=kb.kb_retrievals if kb else [],
+            )
+        if shadow.held_unanswered:
+            await KnowledgeBase.report_unanswered(shadow, query)
+        return documents
+
+    async def report_unanswered(self, question: str) -> Optional[str]:
+        """
+        Hold back reports from prefetches until the query is confirmed by the
+        final transcript, so abandoned partial questions are never filed.
+        """
+        if self.holding_reports:
+            self.held_unanswered = True
+            return None
+        return await super().report_unanswered(question)
+
     def allow_retrieval(self, transcript: str) -> bool:
         """
-        Only allow retrieval if the transcript contains a trigger phrase.
+        Allow retrieval if the transcript contains a trigger phrase, or if the
+        local retrieval gate decides the turn needs knowledge (skipping small
+        talk such as "yes", "thanks" or "hello").
         """
-        logger.info(f"Checking if transcript '{transcript}' allows retrieval...")
-        for phrase in self.TRIGGER_PHRASES:
-            if phrase in transcript.lower():
-                logger.info("Retrieval allowed.")
-                return True
-        logger.info("Retrieval not allowed.")
-        return False
+        decision = self.gate.decide(transcript)
+        logger.debug(
+            f"Retrieval {'allowed' if decision.retrieve else 'not allowed'} for '{transcript}' ({decision.reason})"
+        )
+        return decision.retrieve
+
+    def find_trigger(self, transcript: str) -> Optional[TriggerMatch]:
+        """
+        Single-pass trigger phrase lookup. The last result is remembered, so
+        `allow_retrieval` and `pre_process_query` scan each transcript once.
+        """
+        if self._last_match[0] != transcript:
+            self._last_match = (transcript, self.triggers.find(transcript))
+        return self._last_match[1]
 
     def pre_process_query(self, transcript: str) -> str:
         """
         Remove the trigger phrase from the transcript to create a clean query.
         """
-        logger.info(f"Pre-processing query: '{transcript}'")
-        for phrase in self.TRIGGER_PHRASES:
-            if phrase in transcript.lower():
-                query = transcript.lower().replace(phrase, "", 1).strip()
-                logger.info(f"Processed query: '{query}'")
-                return query
-        return transcript
+        match = self.find_trigger(transcript)
+        if match is None:
+            return transcript
+        query = match.strip_from(transcript)
+        logger.debug(f"Processed query: '{query}'")
+        return query
 
     def format_context(self, documents: List[str]) -> str:
         """
         Format retrieved documents into a context string for the LLM.
         """
-        logger.info(f"Formatting context for {len(documents)} documents.")
+        logger.debug(f"Formatting context for {len(documents)} documents.")
 
         if not documents:
             return ""
@@ -72,13 +208,15 @@ class VoiceAgent(Agent):
         )
         super().__init__(
             instructions="You are a helpful voice assistant that can answer questions and help with tasks.",
-            knowledge_base=CustomKnowledgeBase(config),
+            knowledge_base=CustomKnowledgeBase(config, tenant=os.getenv("KB_TENANT", DEFAULT_TENANT)),
         )
 
     async def on_enter(self) -> None:
         await self.session.say("Hello, how can I help you today?")
 
     async def on_exit(self) -> None:
+        self.knowledge_base.cancel_prefetch()
+        logger.info(f"Retrieval gate: {self.knowledge_base.gate.stats.summary()}")
         await self.session.say("Goodbye!")
 
 async def entrypoint(ctx: JobContext):
@@ -90,6 +228,14 @@ async def entrypoint(ctx: JobContext):
         vad=SileroVAD(),
         turn_detector=TurnDetector(),
     )
+
+    # Pipeline hook: start knowledge base retrieval during the end-of-utterance wait
+    @pipeline.on("stt")
+    async def stt_hook(audio_stream):
+        async for event in run_stt(audio_stream):
+            agent.knowledge_base.on_speech_event(event)
+            yield event
+
     session = AgentSession(agent=agent, pipeline=pipeline)
     await session.start(wait_for_participant=True, run_until_shutdown=True)
 
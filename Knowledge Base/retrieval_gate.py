@@ -0,0 +1,188 @@
+# Same module as RAG/retrieval_gate.py; keep the two in sync. Example folders run
+# standalone (each is copied and run on its own), so shared helpers are copied, not imported.
+
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Optional, Protocol, Sequence
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Turns made up only of these words are acknowledgements, greetings or fillers
+SMALL_TALK_WORDS = frozenset(
+    "yes yeah yep yup no nope nah ok okay sure right alright fine great cool nice perfect awesome good "
+    "thanks thank you thx cheers hello hi hey bye goodbye see ya later morning evening afternoon "
+    "uh um hmm mm oh ah got it sounds that's all wow please sorry".split()
+)
+
+# Seed examples for the default classifier. Extend them with phrases from your own domain.
+RETRIEVE_EXAMPLES = (
+    "how do i record a meeting",
+    "what is the pricing for the api",
+    "can you explain how screen sharing works",
+    "tell me about live streaming",
+    "where can i find my api key",
+    "does it support flutter",
+    "does videosdk work with react native",
+    "what about android",
+    "what are the limits on participants",
+    "how much does it cost",
+    "which sdk should i use for ios",
+    "which browsers are supported",
+    "is there a way to mute everyone",
+    "why does my stream keep failing",
+    "i need help with authentication tokens",
+    "explain the difference between the two modes",
+    "what happens if the token expires",
+    "look up the refund policy",
+    "search for recording quality settings",
+)
+SKIP_EXAMPLES = (
+    "yes",
+    "no thanks",
+    "thank you so much",
+    "hello there",
+    "hi how are you",
+    "okay sounds good",
+    "great that works",
+    "bye see you later",
+    "can you repeat that",
+    "sorry what did you say",
+    "that's all for now",
+    "never mind",
+    "wait hold on",
+    "perfect got it",
+    "you're funny",
+    "let me think",
+)
+
+
+def words(text: str) -> list:
+    return _WORD_RE.findall(text.lower())
+
+
+class Classifier(Protocol):
+    def score(self, tokens: Sequence[str]) -> float:
+        """Probability in [0, 1] that a turn with these tokens needs retrieval."""
+        ...
+
+
+class NaiveBayesClassifier:
+    """Two-class multinomial naive Bayes over word unigrams and bigrams.
+
+    Trained in microseconds from a handful of examples and scores a turn with
+    a few dictionary lookups, so it fits comfortably in the gate's budget.
+    """
+
+    def __init__(self, positive: Iterable[str], negative: Iterable[str], alpha: float = 1.0):
+        self.alpha = alpha
+        self._counts = (Counter(), Counter())
+        docs = [0, 0]
+        for label, examples in ((1, positive), (0, negative)):
+            for example in examples:
+                self._counts[label].update(self._features(words(example)))
+                docs[label] += 1
+        self._totals = [sum(c.values()) for c in self._counts]
+        self._vocab = len(set(self._counts[0]) | set(self._counts[1]))
+        self._log_prior = [math.log(docs[i] / sum(docs)) for i in (0, 1)]
+
+    @staticmethod
+    def _features(tokens: Sequence[str]) -> list:
+        return list(tokens) + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def score(self, tokens: Sequence[str]) -> float:
+        log_p = list(self._log_prior)
+        for feature in self._features(tokens):
+            for label in (0, 1):
+                count = self._counts[label].get(feature, 0)
+                log_p[label] += math.log((count + self.alpha) / (self._totals[label] + self.alpha * self._vocab))
+        # Numerically stable softmax over the two classes
+        return 1.0 / (1.0 + math.exp(max(min(log_p[0] - log_p[1], 50.0), -50.0)))
+
+
+DEFAULT_CLASSIFIER = NaiveBayesClassifier(RETRIEVE_EXAMPLES, SKIP_EXAMPLES)
+
+
+@dataclass
+class GateDecision:
+    retrieve: bool
+    reason: str
+    score: Optional[float] = None
+
+
+@dataclass
+class GateStats:
+    turns: int = 0
+    retrieved: int = 0
+    skipped: int = 0
+    reasons: Dict[str, int] = field(default_factory=Counter)
+    total_decision_ms: float = 0.0
+
+    @property
+    def skip_rate(self) -> float:
+        return self.skipped / self.turns if self.turns else 0.0
+
+    @property
+    def mean_decision_ms(self) -> float:
+        return self.total_decision_ms / self.turns if self.turns else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.turns} turns, {self.retrieved} retrieved, {self.skipped} skipped "
+            f"({self.skip_rate:.0%}), {self.mean_decision_ms:.3f} ms/decision, reasons={dict(self.reasons)}"
+        )
+
+
+class RetrievalGate:
+    """Decides locally whether a user turn needs retrieval at all.
+
+    Checks run cheapest first: empty turns are skipped, turns containing a
+    `trigger_phrases` entry (or for which the `trigger` predicate is true)
+    always retrieve, even if every word is small talk, then pure small-talk
+    turns are skipped, and anything left is scored by `classifier` against
+    `threshold`. The default threshold
+    leans towards retrieving, since a missed retrieval costs more than a
+    wasted one. Create one gate per session; `stats` counts that session's
+    decisions.
+    """
+
+    def __init__(
+        self,
+        classifier: Optional[Classifier] = None,
+        trigger_phrases: Sequence[str] = (),
+        threshold: float = 0.35,
+        trigger: Optional[Callable[[str], bool]] = None,
+    ):
+        self.classifier = classifier or DEFAULT_CLASSIFIER
+        self.trigger_phrases = tuple(p.lower() for p in trigger_phrases)
+        self.threshold = threshold
+        self.trigger = trigger
+        self.stats = GateStats()
+
+    def evaluate(self, transcript: str) -> GateDecision:
+        """Classify `transcript` without recording it in `stats`."""
+        tokens = words(transcript)
+        if not tokens:
+            return GateDecision(False, "empty")
+        lowered = transcript.lower()
+        if any(phrase in lowered for phrase in self.trigger_phrases) or (self.trigger and self.trigger(transcript)):
+            return GateDecision(True, "trigger")
+        if all(token in SMALL_TALK_WORDS for token in tokens):
+            return GateDecision(False, "small_talk")
+        score = self.classifier.score(tokens)
+        return GateDecision(score >= self.threshold, "classifier", score)
+
+    def decide(self, transcript: str) -> GateDecision:
+        """Classify `transcript` and record the decision in `stats`."""
+        start = time.perf_counter()
+        decision = self.evaluate(transcript)
+        self.stats.total_decision_ms += (time.perf_counter() - start) * 1000
+        self.stats.turns += 1
+        self.stats.reasons[decision.reason] += 1
+        if decision.retrieve:
+            self.stats.retrieved += 1
+        else:
+            self.stats.skipped += 1
+        return decision
@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+
+
+@dataclass(frozen=True)
+class TriggerMatch:
+    phrase: str
+    start: int
+    end: int
+
+    def strip_from(self, text: str) -> str:
+        """Return `text` with the matched phrase removed."""
+        return " ".join(f"{text[:self.start]} {text[self.end:]}".split())
+
+
+class TriggerMatcher:
+    """Aho-Corasick automaton over a fixed set of trigger phrases.
+
+    Built once, then `find` scans a transcript in a single pass regardless of
+    how many phrases there are. Matching is case-insensitive and, by default,
+    only on whole words, so "search for" does not fire inside "research for".
+    Instances are immutable after construction and safe to share between
+    sessions.
+    """
+
+    def __init__(self, phrases: Iterable[str], whole_words: bool = True):
+        self.whole_words = whole_words
+        self.phrases: List[str] = list(dict.fromkeys(" ".join(p.lower().split()) for p in phrases if p.strip()))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Lengths of every phrase that ends at each state, including via failure links
+        self._output: List[List[int]] = [[]]
+        for phrase in self.phrases:
+            self._add(phrase)
+        self._link()
+        self._max_len = max(map(len, self.phrases), default=0)
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def _add(self, phrase: str) -> None:
+        state = 0
+        for ch in phrase:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append(len(phrase))
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def find(self, text: str) -> Optional[TriggerMatch]:
+        """Return the leftmost (then longest) phrase occurrence in `text`, or None."""
+        best: Optional[tuple] = None
+        state = 0
+        for i, ch in enumerate(text):
+            # Per-character lowering keeps indices aligned with `text`; tabs and newlines match spaces
+            ch = " " if ch.isspace() else ch.lower()
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length in self._output[state]:
+                start, end = i + 1 - length, i + 1
+                if self.whole_words and not self._on_word_boundaries(text, start, end):
+                    continue
+                if best is None or start < best[0] or (start == best[0] and end > best[1]):
+                    best = (start, end)
+            # No later match can start at or before the best one
+            if best is not None and i + 1 - self._max_len >= best[0]:
+                break
+        if best is None:
+            return None
+        return TriggerMatch(text[best[0]:best[1]].lower(), best[0], best[1])
+
+    @staticmethod
+    def _on_word_boundaries(text: str, start: int, end: int) -> bool:
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+_matchers: Dict[str, TriggerMatcher] = {}
+_tenant_phrases: Optional[Dict[str, List[str]]] = None
+_lock = threading.Lock()
+
+
+def load_tenant_phrases(path: Optional[str]) -> Dict[str, List[str]]:
+    """Read a JSON file mapping tenant id to its list of trigger phrases."""
+    if not path:
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load trigger phrases from {path}: {e}")
+        return {}
+    return {str(tenant): [str(p) for p in phrases] for tenant, phrases in data.items()}
+
+
+def get_matcher(tenant: str = DEFAULT_TENANT, default_phrases: Sequence[str] = ()) -> TriggerMatcher:
+    """Return the worker-wide matcher for `tenant`, compiling it on first use.
+
+    Tenant phrase sets come from the JSON file named by `TRIGGER_PHRASES_FILE`
+    (read once per worker); tenants without an entry use `default_phrases`.
+    """
+    global _tenant_phrases
+    matcher = _matchers.get(tenant)
+    if matcher is not None:
+        return matcher
+    with _lock:
+        if tenant not in _matchers:
+            if _tenant_phrases is None:
+                _tenant_phrases = load_tenant_phrases(os.getenv("TRIGGER_PHRASES_FILE"))
+            _matchers[tenant] = TriggerMatcher(_tenant_phrases.get(tenant, default_phrases))
+            logger.info(f"Compiled {len(_matchers[tenant])} trigger phrases for tenant '{tenant}'")
+        return _matchers[tenant]
@@ -7,7 +7,8 @@ from videosdk.plugins.elevenlabs import ElevenLabsTTS
 from videosdk.plugins.openai import OpenAILLM
 from videosdk.plugins.silero import SileroVAD
 from videosdk.plugins.turn_detector import NamoTurnDetectorV1
-from memory_utils import Mem0MemoryManager, build_agent_instructions
+from context_slot import ContextSlot
+from memory_utils import Mem0MemoryManager, MemoryExtractor, build_agent_instructions
 
 
 class ConciergeVoiceAgent(Agent):
@@ -26,65 +27,95 @@ class ConciergeVoiceAgent(Agent):
         await self.session.say("Goodbye!")
 
 
+# Participant metadata keys that carry an identity set by your backend when it issues the
+# participant's token (or by the SIP gateway for phone callers). Never the display name,
+# which callers choose themselves and which is not unique.
+USER_ID_METADATA_KEYS = ("userId", "user_id", "customerId", "callerNumber")
+
+
+def resolve_user_id(context: JobContext, participant_id: str) -> str:
+    participant = None
+    if context.room and context.room.meeting:
+        participant = context.room.meeting.participants.get(participant_id)
+    metadata = getattr(participant, "meta_data", None) or {}
+    for key in USER_ID_METADATA_KEYS:
+        if metadata.get(key):
+            return str(metadata[key])
+    return os.getenv("MEM0_DEFAULT_USER_ID", "demo-voice-user")
+
+
 async def start_session(context: JobContext):
-    # Setup memory manager
-    mem0_api_key = os.getenv("MEM0_API_KEY")
+    session = None
     memory_manager = None
-    if mem0_api_key:
-        memory_manager = Mem0MemoryManager(
-            api_key=mem0_api_key,
-            user_id=os.getenv("MEM0_DEFAULT_USER_ID", "demo-voice-user")
-        )
+    memory_extractor = None
 
-    # Build agent with pre-loaded memories as instructions context
-    instructions, remembered_facts = await build_agent_instructions(memory_manager)
-    agent = ConciergeVoiceAgent(instructions=instructions, remembered_facts=remembered_facts)
-
-    pipeline = Pipeline(
-        stt=DeepgramSTT(model="nova-2", language="en"),
-        llm=OpenAILLM(model="gpt-4o"),
-        tts=ElevenLabsTTS(model="eleven_flash_v2_5"),
-        vad=SileroVAD(threshold=0.35),
-        turn_detector=NamoTurnDetectorV1(),
-    )
-
-    pending_user_message = None
-
-    # Pipeline hook: search and inject relevant memories at the start of each user turn
-    @pipeline.on("user_turn_start")
-    async def on_user_turn_start(transcript: str):
-        nonlocal pending_user_message
-        pending_user_message = transcript
-        if not memory_manager:
-            return
-        relevant = await memory_manager.search(transcript)
-        if relevant:
-            context_str = "\n".join(f"- {m}" for m in relevant)
-            agent.chat_context.add_message(
-                role="system",
-                content=f"Relevant memories about this caller:\n{context_str}\n\nUse these to personalize your response."
+    try:
+        await context.connect()
+        participant_id = await context.wait_for_participant()
+
+        # Setup memory manager and start loading the caller's memories right away;
+        # a returning caller within the cache TTL is served from the worker cache
+        mem0_api_key = os.getenv("MEM0_API_KEY")
+        if mem0_api_key:
+            memory_manager = Mem0MemoryManager(
+                api_key=mem0_api_key,
+                user_id=resolve_user_id(context, participant_id)
             )
+            memory_manager.prefetch()
+
+        pipeline = Pipeline(
+            stt=DeepgramSTT(model="nova-2", language="en"),
+            llm=OpenAILLM(model="gpt-4o"),
+            tts=ElevenLabsTTS(model="eleven_flash_v2_5"),
+            vad=SileroVAD(threshold=0.35),
+            turn_detector=NamoTurnDetectorV1(),
+        )
+
+        # Build agent with pre-loaded memories as instructions context
+        instructions, remembered_facts = await build_agent_instructions(memory_manager)
+        agent = ConciergeVoiceAgent(instructions=instructions, remembered_facts=remembered_facts)
 
-    # Pipeline hook: store memory-worthy exchanges after the LLM responds
-    @pipeline.on("llm")
-    async def on_llm(data: dict):
-        nonlocal pending_user_message
-        if not memory_manager or not pending_user_message:
-            pending_user_message = None
-            return
-        user_text = pending_user_message
         pending_user_message = None
-        if memory_manager.should_store(user_text):
-            await memory_manager.record_memory(user_text, data.get("text", "") or None)
+        # Scores turns off the event loop and only forwards likely facts to Mem0
+        memory_extractor = MemoryExtractor(memory_manager.record_memory) if memory_manager else None
+        memory_context = ContextSlot(
+            agent,
+            render=lambda memories: "Relevant memories about this caller:\n"
+            + "\n".join(f"- {m}" for m in memories)
+            + "\n\nUse these to personalize your response.",
+            max_tokens=300,
+        )
 
-    session = AgentSession(agent=agent, pipeline=pipeline)
+        # Pipeline hook: search and inject relevant memories at the start of each user turn.
+        # The slot replaces the previous turn's memories so the prompt stays the same size.
+        @pipeline.on("user_turn_start")
+        async def on_user_turn_start(transcript: str):
+            nonlocal pending_user_message
+            pending_user_message = transcript
+            if not memory_manager:
+                return
+            memory_context.update(await memory_manager.search(transcript))
+
+        # Pipeline hook: hand each exchange to the extractor after the LLM responds.
+        # Scoring and the Mem0 write both happen in the background.
+        @pipeline.on("llm")
+        async def on_llm(data: dict):
+            nonlocal pending_user_message
+            if not memory_manager or not pending_user_message:
+                pending_user_message = None
+                return
+            user_text = pending_user_message
+            pending_user_message = None
+            memory_extractor.submit(user_text, data.get("text", "") or None)
 
-    try:
-        await context.connect()
+        session = AgentSession(agent=agent, pipeline=pipeline)
         await session.start()
         await asyncio.Event().wait()
     finally:
-        await session.close()
+        if session:
+            await session.close()
+        if memory_extractor:
+            await memory_extractor.close()
         if memory_manager:
             await memory_manager.close()
         await context.shutdown()
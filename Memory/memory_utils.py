@@ -1,38 +1,525 @@
+import asyncio
+import contextlib
+import glob
+import hashlib
+import json
+import logging
+import math
 import os
-from typing import List, Optional
+import re
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
 from mem0.client.main import AsyncMemoryClient
 
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows, where an open journal cannot be renamed instead
+    fcntl = None
+
+JOURNAL_DIR = os.getenv("MEM0_JOURNAL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".mem0_journal"))
+
+
+def _try_lock(f) -> bool:
+    """Take an exclusive lock on an open journal without waiting; held until the file is closed."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+class WriteBehindQueue:
+    """Buffers memory writes and flushes them to the backend in batches in the background.
+
+    `put` returns immediately. Entries are appended to a local JSONL journal
+    before they are queued and acknowledged there once flushed, so anything
+    still pending when the worker dies is replayed by the next queue opened on
+    the same `journal_path`. Each queue writes its own journal next to that
+    path and holds an exclusive lock on it, so concurrent sessions for the
+    same caller never touch each other's files; journals whose lock is free
+    are claimed with an atomic rename. A fact already waiting in the queue is
+    coalesced with the new one instead of being written twice.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[dict]], Awaitable[None]],
+        journal_path: str,
+        flush_interval: float = 2.0,
+        max_batch_size: int = 10,
+        max_retry_delay: float = 60.0,
+    ):
+        self._flush = flush
+        root, ext = os.path.splitext(journal_path)
+        self._journal_pattern = f"{glob.escape(root)}.*{ext}"
+        self.journal_path = f"{root}.{os.getpid()}-{uuid.uuid4().hex[:8]}{ext}"
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_retry_delay = max_retry_delay
+        self._pending: Dict[str, dict] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.flushed = 0
+        self.coalesced = 0
+        os.makedirs(os.path.dirname(journal_path) or ".", exist_ok=True)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        _try_lock(self._journal)
+        for entry in self._recover(journal_path):
+            self._pending[entry["key"]] = entry
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @staticmethod
+    def fact_key(user_message: str) -> str:
+        return hashlib.sha256(" ".join(user_message.lower().split()).encode("utf-8")).hexdigest()[:16]
+
+    def _recover(self, legacy_path: str) -> List[dict]:
+        """Claim journals left by queues that are no longer running and move their unacknowledged entries here."""
+        entries: Dict[str, dict] = {}
+        claimed: List[str] = []
+        root, ext = os.path.splitext(self.journal_path)
+        with contextlib.ExitStack() as stack:
+            for path in [legacy_path, *glob.glob(self._journal_pattern)]:
+                if path == self.journal_path:
+                    continue
+                try:
+                    f = stack.enter_context(open(path, "r", encoding="utf-8"))
+                except OSError:
+                    continue
+                if not _try_lock(f):
+                    continue  # its queue is still running
+                # The rename is the claim: a queue that opened the old name too fails here
+                claim = f"{root}-{len(claimed)}{ext}"
+                try:
+                    os.rename(path, claim)
+                except OSError:
+                    continue
+                claimed.append(claim)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    if "ack" in record:
+                        entries.pop(record["ack"], None)
+                    else:
+                        entries[record["id"]] = record
+            # Keep only the newest entry per fact, as `put` would have
+            latest = {record["key"]: record for record in entries.values()}
+            for record in latest.values():
+                self._append(record)
+            if claimed:
+                os.fsync(self._journal.fileno())
+            # The claimed files stay locked until they are gone
+            for path in claimed:
+                os.unlink(path)
+        if latest:
+            logger.info(f"Recovered {len(latest)} unflushed memories from {len(claimed)} journal(s) into {self.journal_path}")
+        return list(latest.values())
+
+    def _append(self, record: dict) -> None:
+        self._journal.write(json.dumps(record) + "\n")
+        # Reaching the OS page cache is enough to survive a worker crash
+        self._journal.flush()
+
+    def put(self, user_message: str, assistant_message: Optional[str] = None) -> None:
+        key = self.fact_key(user_message)
+        previous = self._pending.get(key)
+        if previous is not None:
+            self.coalesced += 1
+            self._append({"ack": previous["id"]})
+        entry = {"id": uuid.uuid4().hex, "key": key, "user": user_message, "assistant": assistant_message}
+        self._append(entry)
+        self._pending[key] = entry
+        if len(self._pending) >= self.max_batch_size:
+            self._wakeup.set()
+        if not self._closing and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        delay = self.flush_interval
+        while self._pending and not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._closing:
+                return
+            if await self.flush_once():
+                delay = self.flush_interval
+            else:
+                delay = min(delay * 2, self.max_retry_delay)
+
+    async def flush_once(self) -> bool:
+        """Send up to `max_batch_size` pending entries; returns False if the backend failed."""
+        async with self._flush_lock:
+            batch = list(self._pending.values())[:self.max_batch_size]
+            if not batch:
+                return True
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.warning(f"Memory flush of {len(batch)} entries failed, will retry: {e}")
+                return False
+            for entry in batch:
+                # Only drop the entry if it was not replaced by a newer version mid-flush
+                if self._pending.get(entry["key"]) is entry:
+                    del self._pending[entry["key"]]
+                self._append({"ack": entry["id"]})
+            self.flushed += len(batch)
+            return True
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Try to flush what is left; anything that does not make it stays in the journal."""
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._drain(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{len(self._pending)} memories left in {self.journal_path} for the next session")
+        if not self._pending:
+            # Nothing left to replay; unlink while the lock is still held
+            os.unlink(self.journal_path)
+        self._journal.close()
+
+    async def _drain(self) -> None:
+        while self._pending and await self.flush_once():
+            pass
+
+
+class MemoryCache:
+    """Worker-wide cache of each caller's memories, shared by every session in the process.
+
+    Entries expire after `ttl` seconds and the least recently used callers
+    are evicted beyond `max_users`. An expired (or invalidated) entry is still
+    served while a refresh runs in the background, and concurrent loads for
+    the same caller share one request.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_users: int = 1000):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def peek(self, key: str) -> Optional[List[str]]:
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+
+    async def get(self, key: str, load: Callable[[], Awaitable[List[str]]]) -> List[str]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if entry[0] < time.monotonic():
+                self.refresh(key, load)
+            return entry[1]
+        return await asyncio.shield(self.refresh(key, load))
+
+    def refresh(self, key: str, load: Callable[[], Awaitable[List[str]]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, load))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+        return task
+
+    async def _load(self, key: str, load: Callable[[], Awaitable[List[str]]]) -> List[str]:
+        memories = await load()
+        self._entries[key] = (time.monotonic() + self.ttl, memories)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+        return memories
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Loading memories for {key} failed: {task.exception()}")
+
+    def invalidate(self, key: str) -> None:
+        """Mark an entry stale; it is refreshed on its next use."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries[key] = (0.0, entry[1])
+
+
+memory_cache = MemoryCache(
+    ttl=float(os.getenv("MEM0_CACHE_TTL", "300")),
+    max_users=int(os.getenv("MEM0_CACHE_MAX_USERS", "1000")),
+)
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_STOPWORDS = frozenset("a an and are i is it me my of on or the to what with you your do does did".split())
+
+
+class HashingEmbedder:
+    """Dependency-free text embedder: hashed word and character n-gram counts.
+
+    Character n-grams make "call" match "calls" or "calling", which is most
+    of what per-caller memory lookup needs. Embedding a sentence takes tens of
+    microseconds, so both indexing and querying stay in process. Any callable
+    mapping a list of texts to a 2-D array (for example a `fastembed` model)
+    can be used instead.
+    """
+
+    def __init__(self, dim: int = 1024, ngram: int = 3):
+        self.dim = dim
+        self.ngram = ngram
+
+    def _features(self, text: str):
+        for word in _WORD_RE.findall(text.lower()):
+            if word in _STOPWORDS:
+                continue
+            yield word
+            padded = f"<{word}>"
+            for i in range(max(len(padded) - self.ngram + 1, 1)):
+                yield padded[i:i + self.ngram]
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                matrix[row, zlib.crc32(feature.encode("utf-8")) % self.dim] += 1.0
+        return np.log1p(matrix)
+
+
+class FastEmbedEmbedder:
+    """Neural sentence embeddings from a local ONNX model (requires `pip install fastembed`)."""
+
+    def __init__(self, model: str = "BAAI/bge-small-en-v1.5"):
+        from fastembed import TextEmbedding
+
+        self._model = TextEmbedding(model_name=model)
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(list(self._model.embed(texts)), dtype=np.float32)
+
+
+_shared_embedder: Optional[FastEmbedEmbedder] = None
+
+
+def local_embedder() -> Optional[FastEmbedEmbedder]:
+    """The worker-wide neural embedder if MEM0_LOCAL_EMBEDDING_MODEL is set, else None."""
+    global _shared_embedder
+    model = os.getenv("MEM0_LOCAL_EMBEDDING_MODEL")
+    if model and _shared_embedder is None:
+        _shared_embedder = FastEmbedEmbedder(model)
+    return _shared_embedder
+
+
+class MemoryIndex:
+    """In-process vector index over one caller's memories with cosine top-k.
+
+    `blocking` is true for neural embedders, whose calls take milliseconds and
+    should run off the event loop.
+    """
+
+    def __init__(self, embed: Optional[Callable[[List[str]], np.ndarray]] = None, min_score: float = 0.15):
+        self._embed = embed or HashingEmbedder()
+        self.blocking = not isinstance(self._embed, HashingEmbedder)
+        self.min_score = min_score
+        self.texts: List[str] = []
+        self._vectors: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _normalized(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(self._embed(texts), dtype=np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def rebuild(self, memories: List[str]):
+        self.texts = list(dict.fromkeys(m for m in memories if m.strip()))
+        self._vectors = self._normalized(self.texts) if self.texts else None
+
+    def add(self, memory: str):
+        if not memory.strip() or memory in self.texts:
+            return
+        vector = self._normalized([memory])
+        self._vectors = vector if self._vectors is None else np.vstack([self._vectors, vector])
+        self.texts.append(memory)
+
+    def search(self, query: str, top_k: int = 5) -> List[str]:
+        vectors, texts = self._vectors, self.texts
+        if vectors is None or top_k <= 0:
+            return []
+        scores = vectors @ self._normalized([query])[0]
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [texts[i] for i in top[np.argsort(-scores[top])] if scores[i] >= self.min_score]
+
+
+_FACT_FEATURES = [
+    # (weight, pattern) — summed, then squashed with a logistic
+    (2.5, re.compile(r"\b(remember|don'?t forget|keep in mind|note that|for future reference)\b")),
+    (2.0, re.compile(r"\b(my name|call me|i'?m called|my birthday|i was born|my (wife|husband|partner|son|daughter|kids?|dog|cat)|my (job|work|address|email|phone))\b")),
+    (1.8, re.compile(r"\b(i (really )?(like|love|prefer|hate|enjoy|dislike|can'?t stand)|i'?d rather|favou?rite|i(?:'?m| am) (allergic|vegetarian|vegan)|allergic to)\b")),
+    (1.5, re.compile(r"\b(i live|i'?m from|i work|i'?m a|i am a|i usually|i always|i never|every (morning|evening|week|day|monday|tuesday|wednesday|thursday|friday|saturday|sunday))\b")),
+    (0.8, re.compile(r"\b(i|i'm|i've|my|mine)\b")),
+    (-2.0, re.compile(r"\?\s*$")),
+    (-1.5, re.compile(r"^\s*(what|how|why|when|where|who|which|can you|could you|would you|do you|is it|are you)\b")),
+    (-1.0, re.compile(r"\b(right now|today|at the moment|this time)\b")),
+]
+_FACT_BIAS = -2.0
+
+
+def fact_score(text: str) -> float:
+    """Likelihood in [0, 1] that a user turn states a lasting fact about the caller."""
+    lowered = text.lower()
+    if len(lowered.split()) < 3:
+        return 0.0
+    z = _FACT_BIAS + sum(weight for weight, pattern in _FACT_FEATURES if pattern.search(lowered))
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+class MemoryExtractor:
+    """Decides which user turns are worth a remote memory write.
+
+    `submit` only enqueues the turn. A background task scores queued turns in
+    batches of up to `max_batch_size` in a worker thread, so a heavier scorer
+    (for example an ONNX classifier) never runs on the event loop carrying
+    audio, and forwards those scoring at least `threshold` to `on_memorable`.
+    `score` maps a batch of texts to scores; the default is `fact_score`.
+    """
+
+    def __init__(
+        self,
+        on_memorable: Callable[[str, Optional[str]], Awaitable[None]],
+        score: Optional[Callable[[List[str]], List[float]]] = None,
+        threshold: float = 0.5,
+        max_batch_size: int = 8,
+    ):
+        self._on_memorable = on_memorable
+        self._score = score or (lambda texts: [fact_score(t) for t in texts])
+        self.threshold = threshold
+        self.max_batch_size = max_batch_size
+        self._queue: List[Tuple[str, Optional[str]]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.scored = 0
+        self.forwarded = 0
+        self.writes_saved = 0
+
+    def submit(self, user_message: str, assistant_message: Optional[str] = None):
+        self._queue.append((user_message, assistant_message))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._queue:
+            batch, self._queue = self._queue[:self.max_batch_size], self._queue[self.max_batch_size:]
+            try:
+                scores = await asyncio.to_thread(self._score, [user for user, _ in batch])
+            except Exception as e:
+                logger.warning(f"Memory scoring failed, skipping {len(batch)} turns: {e}")
+                continue
+            self.scored += len(batch)
+            for (user, assistant), score in zip(batch, scores):
+                if score < self.threshold:
+                    self.writes_saved += 1
+                    continue
+                self.forwarded += 1
+                logger.debug(f"Memorable turn ({score:.2f}): {user}")
+                await self._on_memorable(user, assistant)
+
+    async def close(self):
+        if self._task is not None:
+            await self._task
+        logger.info(f"Memory extraction: {self.scored} turns scored, {self.forwarded} stored, {self.writes_saved} writes saved")
+
 
 class Mem0MemoryManager:
-    def __init__(self, api_key: str, user_id: str, agent_id: str = "voice_concierge"):
+    def __init__(
+        self,
+        api_key: str,
+        user_id: str,
+        agent_id: str = "voice_concierge",
+        flush_interval: float = 2.0,
+        max_batch_size: int = 10,
+        cache: Optional[MemoryCache] = None,
+        max_cached_memories: int = 100,
+        local_search: bool = os.getenv("MEM0_LOCAL_SEARCH", "1") != "0",
+    ):
         self.user_id = user_id
         self.agent_id = agent_id
         self._client = AsyncMemoryClient(api_key=api_key)
+        self._cache = cache or memory_cache
+        self.cache_key = f"{agent_id}:{user_id}"
+        self.max_cached_memories = max_cached_memories
+        # Per-session vector index over the cached memories plus what the caller said this session
+        embedder = local_embedder() if local_search else None
+        self.local_index = MemoryIndex(embedder, min_score=0.0 if embedder else 0.15) if local_search else None
+        self._indexed_source: Optional[List[str]] = None
+        self._session_memories: List[str] = []
+        journal_name = hashlib.sha256(f"{agent_id}\0{user_id}".encode("utf-8")).hexdigest()[:24]
+        self._writer = WriteBehindQueue(
+            self._add_batch,
+            journal_path=os.path.join(JOURNAL_DIR, f"{journal_name}.jsonl"),
+            flush_interval=flush_interval,
+            max_batch_size=max_batch_size,
+        )
+
+    def prefetch(self):
+        """Start loading this caller's memories into the worker cache without waiting for them."""
+        self._cache.refresh(self.cache_key, self._fetch_all)
+
+    async def _fetch_all(self) -> List[str]:
+        response = await self._client.get_all(
+            version="v2", filters={"user_id": self.user_id}, page_size=self.max_cached_memories, page=1
+        )
+        results = response.get("results", []) if isinstance(response, dict) else response
+        return [m for m in (entry.get("memory") or entry.get("text", "") for entry in results if isinstance(entry, dict)) if m]
 
     async def fetch_recent_memories(self, limit: int = 5) -> List[str]:
         try:
-            response = await self._client.get_all(
-                version="v2", filters={"user_id": self.user_id}, page_size=limit, page=1
-            )
-            results = response.get("results", []) if isinstance(response, dict) else response
-            return [entry.get("memory") or entry.get("text", "") for entry in results if isinstance(entry, dict)][:limit]
+            return (await self._cache.get(self.cache_key, self._fetch_all))[:limit]
         except:
             return []
 
-    def should_store(self, user_message: str) -> bool:
-        keywords = ("remember", "preference", "favorite", "likes", "dislike", "call me", "my name", "birthday")
-        return any(keyword in user_message.lower() for keyword in keywords)
-
     async def record_memory(self, user_message: str, assistant_message: Optional[str] = None):
-        messages = [{"role": "user", "content": user_message}]
-        if assistant_message:
-            messages.append({"role": "assistant", "content": assistant_message})
-        try:
-            await self._client.add(messages, user_id=self.user_id, metadata={"source": "voice-agent"})
-        except:
-            pass
+        """Queue an exchange for storage; returns without waiting on the Mem0 API."""
+        self._writer.put(user_message, assistant_message)
+        # Searchable for the rest of the session, before Mem0 has extracted facts from it
+        self._session_memories.append(user_message)
+        if self.local_index is not None:
+            await self._run_index(self.local_index.add, user_message)
+
+    async def _run_index(self, fn, *args):
+        if self.local_index.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def _add_batch(self, entries: List[dict]):
+        # One add call per batch: Mem0 extracts facts from the combined exchanges
+        messages = []
+        for entry in entries:
+            messages.append({"role": "user", "content": entry["user"]})
+            if entry.get("assistant"):
+                messages.append({"role": "assistant", "content": entry["assistant"]})
+        await self._client.add(messages, user_id=self.user_id, metadata={"source": "voice-agent"})
+        self._cache.invalidate(self.cache_key)
 
     async def search(self, query: str, top_k: int = 5) -> List[str]:
+        if self.local_index is not None and self._cache.peek(self.cache_key) is not None:
+            # Returns the cached set at once; a stale one is refreshed in the background
+            cached = await self._cache.get(self.cache_key, self._fetch_all)
+            # A full page means the caller may have more memories than were cached
+            if len(cached) < self.max_cached_memories:
+                if cached is not self._indexed_source:
+                    self._indexed_source = cached
+                    await self._run_index(self.local_index.rebuild, cached + self._session_memories)
+                return await self._run_index(self.local_index.search, query, top_k)
         try:
             results = await self._client.search(query=query, user_id=self.user_id, limit=top_k)
             entries = results if isinstance(results, list) else results.get("results", [])
@@ -41,6 +528,7 @@ class Mem0MemoryManager:
             return []
 
     async def close(self):
+        await self._writer.close()
         await self._client.async_client.aclose()
 
 
@@ -0,0 +1,110 @@
+from typing import AsyncIterator, Iterator, List, Optional
+
+import numpy as np
+
+# Room audio as delivered to the STT hook: 48 kHz interleaved stereo, 16-bit PCM
+SAMPLE_RATE = 48000
+CHANNELS = 2
+SAMPLE_WIDTH = 2
+
+
+class AudioFrame:
+    """A fixed-size slot of an `AudioFrameRing`, exposed as views over the ring's buffer.
+
+    `data` is a writable memoryview of the PCM bytes and `samples` an int16
+    NumPy array over the same memory, so inspecting, slicing or modifying a
+    frame in place never copies. A frame stays valid until the ring wraps
+    around to its slot; call `tobytes()` to keep audio for longer, and before
+    handing it to anything that may hold on to it, such as an STT plugin.
+    """
+
+    __slots__ = ("data", "samples", "_scratch")
+
+    def __init__(self, data: memoryview, scratch: np.ndarray):
+        self.data = data
+        self.samples = np.frombuffer(data, dtype=np.int16)
+        self._scratch = scratch[: len(self.samples)]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def rms(self) -> float:
+        """Root-mean-square level in int16 units, computed without a temporary array."""
+        if not len(self.samples):
+            return 0.0
+        np.copyto(self._scratch, self.samples, casting="unsafe")
+        return float(np.sqrt(np.dot(self._scratch, self._scratch) / len(self._scratch)))
+
+    def tobytes(self) -> bytes:
+        return self.data.tobytes()
+
+
+class AudioFrameRing:
+    """Re-chunks incoming PCM into fixed-size frames inside one preallocated buffer.
+
+    Each incoming chunk is copied once into the next free slot; the frames
+    handed out are views created when the ring was built, so analysing them
+    allocates no audio buffers per frame. Audio passed on to STT still needs
+    a copy (`AudioFrame.tobytes`). Chunks of any size are accepted and
+    split or joined across slots. `slots` bounds how long a frame may be held
+    before it is overwritten, so keep it above the number of frames any
+    consumer buffers (one second of audio by default).
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        channels: int = CHANNELS,
+        frame_ms: int = 20,
+        slots: int = 50,
+    ):
+        self.frame_bytes = sample_rate * channels * SAMPLE_WIDTH * frame_ms // 1000
+        self._buffer = bytearray(self.frame_bytes * slots)
+        self._scratch = np.empty(self.frame_bytes // SAMPLE_WIDTH, dtype=np.float32)
+        view = memoryview(self._buffer)
+        self._frames: List[AudioFrame] = [
+            AudioFrame(view[i * self.frame_bytes : (i + 1) * self.frame_bytes], self._scratch) for i in range(slots)
+        ]
+        self._slot = 0
+        self._fill = 0
+
+    def _advance(self) -> AudioFrame:
+        frame = self._frames[self._slot]
+        self._slot = (self._slot + 1) % len(self._frames)
+        self._fill = 0
+        return frame
+
+    def write(self, chunk) -> Iterator[AudioFrame]:
+        """Copy `chunk` into the ring and yield every frame it completes."""
+        if self._fill == 0 and len(chunk) == self.frame_bytes:
+            # Fast path: the chunk is exactly one frame
+            self._frames[self._slot].data[:] = chunk
+            yield self._advance()
+            return
+        src = memoryview(chunk).cast("B")
+        pos = 0
+        while pos < len(src):
+            n = min(self.frame_bytes - self._fill, len(src) - pos)
+            self._frames[self._slot].data[self._fill : self._fill + n] = src[pos : pos + n]
+            self._fill += n
+            pos += n
+            if self._fill == self.frame_bytes:
+                yield self._advance()
+
+    def flush(self) -> Optional[AudioFrame]:
+        """Return the partially filled frame, if any, e.g. when the stream ends."""
+        if self._fill == 0:
+            return None
+        frame = self._frames[self._slot]
+        partial = AudioFrame(frame.data[: self._fill - self._fill % SAMPLE_WIDTH], self._scratch)
+        self._advance()
+        return partial
+
+    async def frames(self, audio_stream: AsyncIterator[bytes]) -> AsyncIterator[AudioFrame]:
+        """Turn a hook's `audio_stream` into a stream of fixed-size frames."""
+        async for chunk in audio_stream:
+            for frame in self.write(chunk):
+                yield frame
+        tail = self.flush()
+        if tail is not None:
+            yield tail
@@ -0,0 +1,112 @@
+"""
+Audio hook allocation benchmark
+Measures heap allocations per second of audio on the STT hook path, with no hook,
+with the example's pass-through hook (drops chunks under 300 bytes), and with an
+AudioFrameRing hook that meters every 20 ms frame in place and copies it out for STT.
+
+Allocations are measured with tracemalloc as the bytes allocated while each chunk
+travels through the hook, summed over the run.
+
+Usage:
+    python "Pipeline Hooks/benchmark_audio_frames.py" --seconds 60 --chunk-ms 10
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+import numpy as np
+
+from audio_frames import CHANNELS, SAMPLE_RATE, AudioFrameRing
+
+FRAME_MS = 20
+
+
+def make_chunks(seconds: float, chunk_ms: int) -> list:
+    rng = np.random.default_rng(0)
+    samples = SAMPLE_RATE * CHANNELS * chunk_ms // 1000
+    count = int(seconds * 1000 / chunk_ms)
+    return [(rng.standard_normal(samples) * 1000).astype(np.int16).tobytes() for _ in range(count)]
+
+
+async def source(chunks: list, meter=None):
+    for chunk in chunks:
+        if meter is not None:
+            meter.step()
+        yield chunk
+    if meter is not None:
+        meter.step()
+
+
+async def no_hook(audio_stream):
+    async for audio in audio_stream:
+        yield audio
+
+
+async def passthrough_hook(audio_stream):
+    async for audio in audio_stream:
+        if len(audio) < 300:
+            continue
+        yield audio
+
+
+async def ring_hook(audio_stream):
+    ring = AudioFrameRing(frame_ms=FRAME_MS)
+    async for frame in ring.frames(audio_stream):
+        frame.rms()
+        yield frame.tobytes()
+
+
+class AllocationMeter:
+    """Sums, per chunk, how far traced memory rose above its level when the chunk entered the hook."""
+
+    def __init__(self):
+        self.allocated = 0
+        self._base = None
+
+    def step(self) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        if self._base is not None:
+            self.allocated += max(0, peak - self._base)
+        tracemalloc.reset_peak()
+        self._base = current
+
+
+async def drain(hook, chunks: list, meter=None) -> int:
+    sent = 0
+    async for frame in hook(source(chunks, meter)):
+        sent += len(frame)
+    return sent
+
+
+async def measure(hook, chunks: list, seconds: float) -> tuple:
+    start = time.perf_counter()
+    await drain(hook, chunks)
+    elapsed = time.perf_counter() - start
+
+    meter = AllocationMeter()
+    tracemalloc.start()
+    try:
+        await drain(hook, chunks, meter)
+    finally:
+        tracemalloc.stop()
+    return meter.allocated / seconds, elapsed * 1e6 / len(chunks)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0, help="seconds of audio to push through each hook")
+    parser.add_argument("--chunk-ms", type=int, default=FRAME_MS, help="duration of each incoming chunk")
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.seconds, args.chunk_ms)
+    print(f"{args.seconds:.0f}s of {SAMPLE_RATE} Hz stereo audio in {args.chunk_ms} ms chunks ({len(chunks)} chunks)")
+    print(f"{'hook':<14}{'allocated/s audio':>20}{'us/chunk':>12}")
+    for name, hook in (("none", no_hook), ("passthrough", passthrough_hook), ("ring", ring_hook)):
+        rate, per_chunk = await measure(hook, chunks, args.seconds)
+        print(f"{name:<14}{rate / 1024:>16.1f} KiB{per_chunk:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -16,13 +16,14 @@ Env: see `.env.example` at the repo root for all variables (VideoSDK auth + prov
 """
 
 import logging
-import re
 from videosdk.agents import Agent, AgentSession, Pipeline, WorkerJob, JobContext, RoomOptions, run_stt, run_tts
 from videosdk.plugins.deepgram import DeepgramSTT
 from videosdk.plugins.silero import SileroVAD
 from videosdk.plugins.turn_detector import TurnDetector, pre_download_model
 from videosdk.plugins.google import GoogleLLM
 from videosdk.plugins.cartesia import CartesiaTTS
+from transcript_normalizer import get_normalizer
+from tts_normalizer import StreamingTextNormalizer
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -55,6 +56,9 @@ async def entrypoint(ctx: JobContext):
     # -------------------------------------------------------------------------
     # STT Hook: filter noise, strip filler words, normalize key phrases
     # -------------------------------------------------------------------------
+    # Compiled once per worker and shared by every session
+    transcript_normalizer = get_normalizer()
+
     @pipeline.on("stt")
     async def stt_hook(audio_stream):
         async def audio_phase():
@@ -64,22 +68,9 @@ async def entrypoint(ctx: JobContext):
                     continue
                 yield audio
 
-        async for event in run_stt(audio_phase()):
+        # Strip filler words and normalize domain phrases in one compiled pass
+        async for event in transcript_normalizer.process(run_stt(audio_phase())):
             if event.data and event.data.text:
-                text = event.data.text.lower()
-
-                # Strip common filler words
-                text = re.sub(r"\b(uh|um|like|you know)\b", "", text)
-
-                # Normalize domain-specific phrases
-                replacements = {
-                    "working hours": "office hours",
-                    "timing": "office hours",
-                }
-                for src, dst in replacements.items():
-                    text = re.sub(rf"\b{src}\b", dst, text)
-
-                event.data.text = " ".join(text.split())
                 logger.info(f"[STT] Transcript: {event.data.text}")
 
             yield event
@@ -112,17 +103,14 @@ async def entrypoint(ctx: JobContext):
         logger.info(f"[LLM] Generated: {text[:120]}...")
 
     # -------------------------------------------------------------------------
-    # TTS Hook: normalize text before synthesis (e.g. time formatting)
+    # TTS Hook: normalize text before synthesis (numbers, times, abbreviations)
     # -------------------------------------------------------------------------
     @pipeline.on("tts")
     async def tts_hook(text_stream):
-        async def preprocess_text():
-            async for text in text_stream:
-                # Spell out AM/PM so TTS reads them correctly
-                text = text.replace("AM", "A M").replace("PM", "P M")
-                yield text
-
-        async for audio in run_tts(preprocess_text()):
+        # One normalizer per text stream; it holds back at most a partial token
+        # so matches split across chunks ("9:3" + "0 AM") are still rewritten
+        normalizer = StreamingTextNormalizer()
+        async for audio in run_tts(normalizer.process(text_stream)):
             yield audio
 
     # -------------------------------------------------------------------------
@@ -0,0 +1,104 @@
+import json
+import re
+import threading
+from typing import Any, AsyncIterator, Dict, Iterable, Mapping, Optional, Tuple
+
+FILLER_WORDS = ("uh", "um", "like", "you know")
+
+# Domain phrases rewritten before the transcript reaches the LLM
+DOMAIN_REPLACEMENTS = {
+    "working hours": "office hours",
+    "timing": "office hours",
+}
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """Build a regex alternation with shared prefixes factored out, e.g. `off(?:er|ice)`.
+
+    The regex engine then walks the phrases like a trie instead of retrying
+    every alternative at each position. Spaces match any run of whitespace.
+    """
+    trie: Dict[str, Any] = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [(r"\s+" if ch == " " else re.escape(ch)) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) > 1:
+            body = "(?:" + "|".join(branches) + ")"
+        elif "" in node and len(branches[0]) > 1:
+            body = f"(?:{branches[0]})"
+        else:
+            body = branches[0]
+        return body + "?" if "" in node else body
+
+    return emit(trie)
+
+
+class TranscriptNormalizer:
+    """Removes filler words and rewrites domain phrases in one regex pass per transcript.
+
+    All rules are compiled into a single trie-shaped alternation when the
+    normalizer is built, so each transcript costs one `sub` however many rules
+    there are. Matching is on whole words of the lowercased transcript;
+    when a phrase is both a filler and a replacement, the replacement wins.
+    Instances are immutable; use `get_normalizer` or `load_normalizer` to share
+    one compiled table across every session in the worker.
+    """
+
+    def __init__(self, fillers: Iterable[str] = FILLER_WORDS, replacements: Mapping[str, str] = DOMAIN_REPLACEMENTS):
+        table = {" ".join(f.lower().split()): "" for f in fillers if f.strip()}
+        table.update({" ".join(src.lower().split()): dst for src, dst in replacements.items() if src.strip()})
+        self._table = table
+        self._pattern: Optional[re.Pattern] = re.compile(rf"(?<!\w){_trie_pattern(table)}(?!\w)") if table else None
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def _replace(self, match: re.Match) -> str:
+        phrase = match.group(0)
+        replacement = self._table.get(phrase)
+        return replacement if replacement is not None else self._table[" ".join(phrase.split())]
+
+    def normalize(self, text: str) -> str:
+        text = text.lower()
+        if self._pattern is not None:
+            text = self._pattern.sub(self._replace, text)
+        return " ".join(text.split())
+
+    async def process(self, events: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """Pipeline stage for an STT hook: normalize the text of every STT event passing through."""
+        async for event in events:
+            data = getattr(event, "data", None)
+            if data is not None and data.text:
+                data.text = self.normalize(data.text)
+            yield event
+
+
+_normalizers: Dict[Tuple, TranscriptNormalizer] = {}
+_lock = threading.Lock()
+
+
+def get_normalizer(
+    fillers: Iterable[str] = FILLER_WORDS, replacements: Mapping[str, str] = DOMAIN_REPLACEMENTS
+) -> TranscriptNormalizer:
+    """Return the worker-wide normalizer for these rules, compiling it on first use."""
+    fillers = tuple(fillers)
+    key = (fillers, tuple(sorted(replacements.items())))
+    with _lock:
+        normalizer = _normalizers.get(key)
+        if normalizer is None:
+            normalizer = _normalizers[key] = TranscriptNormalizer(fillers, replacements)
+    return normalizer
+
+
+def load_normalizer(path: str) -> TranscriptNormalizer:
+    """Load rules from a JSON file of the form {"fillers": [...], "replacements": {...}}."""
+    with open(path, encoding="utf-8") as f:
+        rules = json.load(f)
+    return get_normalizer(rules.get("fillers", ()), rules.get("replacements", {}))
@@ -0,0 +1,207 @@
+import re
+from typing import AsyncIterator, Dict, Mapping, Optional
+
+# Spoken forms for abbreviations, matched case-insensitively as whole tokens
+ABBREVIATIONS = {
+    "dr.": "Doctor",
+    "mr.": "Mister",
+    "mrs.": "Missus",
+    "ms.": "Miz",
+    "e.g.": "for example",
+    "i.e.": "that is",
+    "vs.": "versus",
+    "approx.": "approximately",
+    "&": "and",
+}
+
+# Never hold back more than this many characters waiting for a match to complete
+MAX_HOLDBACK = 24
+
+_ONES = (
+    "zero one two three four five six seven eight nine ten eleven twelve thirteen "
+    "fourteen fifteen sixteen seventeen eighteen nineteen"
+).split()
+_TENS = "_ _ twenty thirty forty fifty sixty seventy eighty ninety".split()
+_SCALES = ((10**12, "trillion"), (10**9, "billion"), (10**6, "million"), (1000, "thousand"))
+_ORDINALS = {"one": "first", "two": "second", "three": "third", "five": "fifth", "eight": "eighth", "nine": "ninth", "twelve": "twelfth"}
+
+
+def number_to_words(n: int) -> str:
+    if n < 20:
+        return _ONES[n]
+    if n < 100:
+        return _TENS[n // 10] + ("" if n % 10 == 0 else "-" + _ONES[n % 10])
+    if n < 1000:
+        return _ONES[n // 100] + " hundred" + ("" if n % 100 == 0 else " " + number_to_words(n % 100))
+    for scale, name in _SCALES:
+        if n >= scale:
+            if n // scale >= 1000:
+                break
+            rest = n % scale
+            return f"{number_to_words(n // scale)} {name}" + ("" if rest == 0 else " " + number_to_words(rest))
+    # Too large to read as a quantity: read digit by digit
+    return " ".join(_ONES[int(d)] for d in str(n))
+
+
+def _ordinal(n: int) -> str:
+    words = number_to_words(n)
+    head, _, last = words.rpartition(" ")
+    stem, hyphen, unit = last.rpartition("-")
+    unit = _ORDINALS.get(unit) or (unit[:-1] + "ieth" if unit.endswith("y") else unit + "th")
+    return f"{head} {stem}{hyphen}{unit}".strip()
+
+
+def _digits(text: str) -> str:
+    return " ".join(_ONES[int(d)] for d in text)
+
+
+def _digit_run(text: str) -> str:
+    # Versions, phone numbers, dates: "2.0.1", "555-1234". A short dashed pair is a range.
+    groups = re.split(r"([.\-])", text)
+    if len(groups) == 3 and groups[1] == "-" and len(groups[0]) <= 2 and len(groups[2]) <= 2:
+        return f"{number_to_words(int(groups[0]))} to {number_to_words(int(groups[2]))}"
+    return "".join(" point " if g == "." else ", " if g == "-" else _digits(g) for g in groups)
+
+
+def _meridiem(letter: str, dot: Optional[str]) -> str:
+    return f" {letter.upper()} M" + (dot or "")
+
+
+def _time(hour: str, minute: str, meridiem: Optional[str]) -> str:
+    spoken = number_to_words(int(hour))
+    if minute == "00":
+        return spoken if meridiem else spoken + " o'clock"
+    if minute.startswith("0"):
+        return f"{spoken} oh {_ONES[int(minute)]}"
+    return f"{spoken} {number_to_words(int(minute))}"
+
+
+_NUMBER_RULES = r"""
+    (?<![\w:])
+    (?:
+        (?P<hour>\d{1,2}):(?P<minute>[0-5]\d)(?:\s?(?P<tmer>[AaPp])\.?\s?[Mm]\b(?P<tdot>\.)?)?
+      | (?P<mhour>\d{1,2})\s?(?P<mer>[AaPp])\.?\s?[Mm]\b(?P<mdot>\.)?
+      | \$(?P<dollars>\d{1,3}(?:,\d{3})+|\d+)(?:\.(?P<cents>\d{2}))?
+      | (?P<percent>\d+(?:\.\d+)?)%
+      | (?P<ordinal>\d+)(?:st|nd|rd|th)
+      | (?P<decimal>\d+\.\d+)(?![.\-]\d)
+      | (?P<integer>\d{1,3}(?:,\d{3})+|\d+)(?![.\-]\d)
+      | (?P<digitrun>\d+(?:[.\-]\d+)+)
+    )
+    (?!\w)
+"""
+
+
+def _compile(abbreviations: Mapping[str, str]) -> "re.Pattern":
+    keys = sorted(abbreviations, key=len, reverse=True)
+    alternation = "|".join(re.escape(k) for k in keys)
+    return re.compile(rf"{_NUMBER_RULES} | (?<!\w)(?P<abbr>(?i:{alternation}))(?![\w.])", re.X)
+
+
+_DEFAULT_PATTERN = _compile(ABBREVIATIONS)
+_TAIL_RE = re.compile(r"\S*$")
+_TRAILING_NUMBER_RE = re.compile(r"\$?\d\S*\s*$")
+
+
+class StreamingTextNormalizer:
+    """Normalizes streamed LLM text for TTS: numbers, times, currency and abbreviations.
+
+    Text is rewritten only up to the last point where no rule can still match
+    across the next chunk. The held-back suffix is at most the trailing
+    partial token, plus a trailing number that may still be followed by
+    AM/PM, and never longer than `max_holdback` characters, so first audio is
+    delayed by one token at most. Use one instance per text stream; `flush`
+    releases whatever is held when the stream ends.
+    """
+
+    def __init__(self, abbreviations: Optional[Mapping[str, str]] = None, max_holdback: int = MAX_HOLDBACK):
+        if abbreviations is None:
+            self._abbreviations: Dict[str, str] = ABBREVIATIONS
+            self._pattern = _DEFAULT_PATTERN
+        else:
+            self._abbreviations = {k.lower(): v for k, v in abbreviations.items()}
+            self._pattern = _compile(self._abbreviations)
+        self._prefixes = {k[:i] for k in self._abbreviations for i in range(1, len(k) + 1)}
+        self._prefixes.update(("a", "a.", "p", "p."))
+        self.max_holdback = max_holdback
+        self._pending = ""
+        # Last emitted character; lets lookbehinds see across chunk boundaries
+        self._prev = " "
+
+    def _may_extend(self, token: str) -> bool:
+        token = token.lstrip("(\"'")
+        return any(c.isdigit() for c in token) or token.startswith("$") or token.lower() in self._prefixes
+
+    def _safe_end(self, text: str) -> int:
+        end = len(text)
+        tail = _TAIL_RE.search(text).start()
+        if tail < end and self._may_extend(text[tail:]):
+            end = tail
+        number = _TRAILING_NUMBER_RE.search(text, 0, end)
+        if number is not None and (end == len(text) or text[end:].lower().lstrip() in self._prefixes):
+            end = number.start()
+        return end if len(text) - end <= self.max_holdback else len(text)
+
+    def _replace(self, m: "re.Match") -> str:
+        if m.group("abbr") is not None:
+            return self._abbreviations[m.group("abbr").lower()]
+        if m.group("hour") is not None:
+            meridiem = m.group("tmer")
+            spoken = _time(m.group("hour"), m.group("minute"), meridiem)
+            return spoken + (_meridiem(meridiem, m.group("tdot")) if meridiem else "")
+        if m.group("mhour") is not None:
+            return number_to_words(int(m.group("mhour"))) + _meridiem(m.group("mer"), m.group("mdot"))
+        if m.group("dollars") is not None:
+            dollars = int(m.group("dollars").replace(",", ""))
+            spoken = f"{number_to_words(dollars)} dollar{'' if dollars == 1 else 's'}"
+            cents = m.group("cents")
+            if cents and int(cents):
+                spoken += f" and {number_to_words(int(cents))} cent{'' if int(cents) == 1 else 's'}"
+            return spoken
+        if m.group("percent") is not None:
+            return self._number(m.group("percent")) + " percent"
+        if m.group("ordinal") is not None:
+            return _ordinal(int(m.group("ordinal")))
+        if m.group("digitrun") is not None:
+            return _digit_run(m.group("digitrun"))
+        return self._number(m.group("decimal") or m.group("integer"))
+
+    @staticmethod
+    def _number(text: str) -> str:
+        whole, _, fraction = text.replace(",", "").partition(".")
+        spoken = number_to_words(int(whole))
+        return f"{spoken} point {_digits(fraction)}" if fraction else spoken
+
+    def _normalize(self, text: str) -> str:
+        # Match against the previous character too, so rules never start mid-token
+        source = self._prev + text
+        self._prev = text[-1]
+        out = []
+        last = 1
+        for m in self._pattern.finditer(source, 1):
+            out.append(source[last : m.start()])
+            out.append(self._replace(m))
+            last = m.end()
+        out.append(source[last:])
+        return "".join(out)
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of text and return the normalized text that is safe to speak now."""
+        text = self._pending + chunk
+        end = self._safe_end(text)
+        self._pending = text[end:]
+        return self._normalize(text[:end]) if end else ""
+
+    def flush(self) -> str:
+        text, self._pending = self._pending, ""
+        return self._normalize(text) if text else ""
+
+    async def process(self, text_stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Pipeline stage for a TTS hook: normalize a text stream chunk by chunk."""
+        async for chunk in text_stream:
+            text = self.feed(chunk)
+            if text:
+                yield text
+        tail = self.flush()
+        if tail:
+            yield tail
@@ -0,0 +1,62 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+_CAMEL_RE = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|[0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it me my of on or so that the this to "
+    "use what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; identifiers like `startRecording` also yield their parts (`start`, `recording`)."""
+    tokens: List[str] = []
+    for word in _WORD_RE.findall(text):
+        lowered = word.lower()
+        parts = [p.lower() for p in _CAMEL_RE.findall(word)]
+        if lowered not in STOPWORDS:
+            tokens.append(lowered)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over an in-memory inverted index, built once at ingestion time."""
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._doc_len: List[int] = []
+        for doc_id, doc in enumerate(documents):
+            counts = Counter(tokenize(doc))
+            self._doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings[term].append((doc_id, tf))
+        n = len(self._doc_len)
+        self._avgdl = (sum(self._doc_len) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Return up to `k` (doc id, score) pairs with a positive score, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for doc_id, tf in postings:
+                norm = 1 - self.b + self.b * self._doc_len[doc_id] / (self._avgdl or 1.0)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
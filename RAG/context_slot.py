@@ -0,0 +1,63 @@
+# Same module as Memory/context_slot.py; keep the two in sync. Example folders run
+# standalone (each is copied and run on its own), so shared helpers are copied, not imported.
+
+from typing import Callable, List, Optional
+
+from videosdk.agents import Agent, ChatMessage
+
+
+def estimate_tokens(text: str) -> int:
+    # Same ~4 characters per token heuristic ChatContext.estimated_tokens uses
+    return len(text) // 4 + 1
+
+
+class ContextSlot:
+    """An ephemeral system message in the agent's chat context.
+
+    Each `update` replaces the message written by the previous one instead of
+    appending a new one, so injected context occupies a fixed amount of the
+    prompt for the whole call. Documents whose text is already somewhere else
+    in the chat context are skipped, and the remaining ones are added in order
+    until `max_tokens` is reached.
+    """
+
+    def __init__(
+        self,
+        agent: Agent,
+        render: Callable[[List[str]], str],
+        max_tokens: int = 600,
+    ):
+        self.agent = agent
+        self.render = render
+        self.max_tokens = max_tokens
+        self._message_id: Optional[str] = None
+
+    def update(self, documents: List[str]) -> List[str]:
+        """Replace the slot's contents with `documents`; returns the documents actually injected."""
+        self.clear()
+
+        existing = "\n".join(self._message_text(item) for item in self.agent.chat_context.items if isinstance(item, ChatMessage))
+        selected: List[str] = []
+        for doc in dict.fromkeys(d.strip() for d in documents if d and d.strip()):
+            if doc in existing:
+                continue
+            if estimate_tokens(self.render(selected + [doc])) > self.max_tokens:
+                break
+            selected.append(doc)
+
+        if selected:
+            message = self.agent.chat_context.add_message(role="system", content=self.render(selected))
+            self._message_id = message.id
+        return selected
+
+    def clear(self) -> None:
+        if self._message_id is None:
+            return
+        items = self.agent.chat_context.items
+        items[:] = [item for item in items if getattr(item, "id", None) != self._message_id]
+        self._message_id = None
+
+    @staticmethod
+    def _message_text(message: ChatMessage) -> str:
+        content = message.content if isinstance(message.content, list) else [message.content]
+        return "\n".join(part for part in content if isinstance(part, str))
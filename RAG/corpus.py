@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from bm25 import BM25Index
+from embeddings import EmbeddingCache, EmbeddingProvider, content_hash, embed_documents
+from vector_index import (
+    VectorIndex,
+    corpus_fingerprint,
+    prune_versions,
+    publish_version,
+    read_current,
+    read_fingerprint,
+    version_dir,
+    write_index,
+)
+
+logger = logging.getLogger(__name__)
+
+CORPUS_EXTENSIONS = (".txt", ".md")
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    id: str
+    text: str
+
+
+def chunk_text(text: str, max_chars: int = 800) -> List[str]:
+    """Split on blank lines; paragraphs longer than `max_chars` are packed sentence by sentence."""
+    chunks: List[str] = []
+    for paragraph in _PARAGRAPH_RE.split(text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            chunks.append(paragraph)
+            continue
+        current = ""
+        for sentence in _SENTENCE_RE.split(paragraph):
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def scan_corpus(directory: str) -> Dict[str, Tuple[int, int]]:
+    """Map each corpus file (relative path) to its (mtime_ns, size); cheap enough to poll."""
+    files: Dict[str, Tuple[int, int]] = {}
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            if not name.endswith(CORPUS_EXTENSIONS):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[os.path.relpath(path, directory)] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def load_chunks(directory: str, max_chars: int = 800) -> List[Chunk]:
+    chunks: List[Chunk] = []
+    for relpath in sorted(scan_corpus(directory)):
+        try:
+            with open(os.path.join(directory, relpath), "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError as e:
+            logger.warning(f"Skipping unreadable corpus file {relpath}: {e}")
+            continue
+        chunks.extend(Chunk(f"{relpath}#{i}", chunk) for i, chunk in enumerate(chunk_text(text, max_chars)))
+    return chunks
+
+
+class CorpusIndex:
+    """Keeps a versioned on-disk index of a corpus directory up to date.
+
+    `refresh` re-chunks the directory when any file's mtime or size changed.
+    Chunks are keyed by content hash, so only new or edited chunks are sent to
+    the embedding provider and removed chunks simply drop out of the next
+    version. Each version is written to its own directory and published by
+    atomically replacing the `CURRENT` pointer; `snapshot` then returns the new
+    index, so live sessions switch over on their next query.
+    """
+
+    def __init__(
+        self,
+        corpus_dir: str,
+        index_root: str,
+        provider: EmbeddingProvider,
+        cache: Optional[EmbeddingCache] = None,
+        batch_size: int = 64,
+        chunk_chars: int = 800,
+    ):
+        self.corpus_dir = corpus_dir
+        self.index_root = index_root
+        self.provider = provider
+        self.cache = cache
+        self.batch_size = batch_size
+        self.chunk_chars = chunk_chars
+        self._current: Optional[Tuple[VectorIndex, BM25Index]] = None
+        self._directory: Optional[str] = None
+        self._signature: Optional[Dict[str, Tuple[int, int]]] = None
+        self._lock = asyncio.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+
+    def snapshot(self) -> Tuple[VectorIndex, BM25Index]:
+        if self._current is None:
+            raise RuntimeError("CorpusIndex.refresh() must complete before the index is used")
+        return self._current
+
+    async def refresh(self) -> bool:
+        """Rebuild and swap in a new index version if the corpus changed; returns True on swap."""
+        async with self._lock:
+            signature = scan_corpus(self.corpus_dir)
+            if self._current is not None and signature == self._signature:
+                return False
+
+            chunks = load_chunks(self.corpus_dir, self.chunk_chars)
+            hashes = [content_hash(chunk.text, self.provider.name) for chunk in chunks]
+            fingerprint = corpus_fingerprint([f"{chunk.id}\0{h}" for chunk, h in zip(chunks, hashes)])
+            if self._current is not None and self._current[0].fingerprint == fingerprint:
+                self._signature = signature
+                return False
+
+            directory = version_dir(self.index_root, fingerprint)
+            if read_fingerprint(directory) != fingerprint:
+                texts = [chunk.text for chunk in chunks]
+                embeddings = await embed_documents(texts, self.provider, cache=self.cache, batch_size=self.batch_size)
+                write_index(directory, [chunk.id for chunk in chunks], texts, embeddings, fingerprint)
+            if read_current(self.index_root) != directory:
+                publish_version(self.index_root, directory)
+
+            previous = self._current
+            # Building the BM25 postings is CPU work; keep it off the audio event loop
+            self._current = await asyncio.to_thread(self._open, directory)
+            self._signature = signature
+            if previous is not None:
+                old_texts, new_texts = set(previous[0].texts), set(self._current[0].texts)
+                logger.info(
+                    f"Corpus index swapped: {len(new_texts - old_texts)} chunks added, "
+                    f"{len(old_texts - new_texts)} removed, {len(self._current[0])} total"
+                )
+            keep = [directory] + ([self._directory] if self._directory else [])
+            self._directory = directory
+            prune_versions(self.index_root, keep)
+            return True
+
+    @staticmethod
+    def _open(directory: str) -> Tuple[VectorIndex, BM25Index]:
+        index = VectorIndex(directory)
+        return index, BM25Index(index.texts)
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        """Poll the corpus directory every `interval` seconds (idempotent)."""
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch(interval))
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Corpus refresh failed, keeping the current index: {e}")
+
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from openai import AsyncOpenAI
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+LOCAL_EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
+
+_client: Optional[AsyncOpenAI] = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """One pooled AsyncOpenAI client per worker process, shared by every agent and ingestion run."""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def content_hash(text: str, model: str = EMBEDDING_MODEL) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingProvider(ABC):
+    """Turns texts into a float32 matrix with one row per text.
+
+    `name` identifies the model; it is part of every cache key and index
+    fingerprint, so switching providers never mixes incompatible vectors.
+    """
+
+    name: str
+
+    @abstractmethod
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        ...
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, model: str = EMBEDDING_MODEL):
+        self.model = model
+        self.name = model
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        response = await get_openai_client().embeddings.create(input=list(texts), model=self.model)
+        ordered = sorted(response.data, key=lambda d: d.index)
+        return np.asarray([d.embedding for d in ordered], dtype=np.float32)
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_local_models: Dict[str, object] = {}
+
+
+def _get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn: never fork a process that is running an event loop and audio threads
+        _process_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _process_pool
+
+
+async def shutdown_process_pool() -> None:
+    """Stop the pool processes; the next local embedding request starts a new pool."""
+    global _process_pool
+    pool, _process_pool = _process_pool, None
+    if pool is not None:
+        await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+
+def _embed_in_pool(model: str, texts: List[str]) -> np.ndarray:
+    """Runs inside a pool process; the ONNX model is loaded once per pool process."""
+    embedder = _local_models.get(model)
+    if embedder is None:
+        from fastembed import TextEmbedding
+
+        embedder = _local_models[model] = TextEmbedding(model_name=model)
+    return np.asarray(list(embedder.embed(texts)), dtype=np.float32)
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """CPU ONNX sentence embeddings (via `fastembed`) computed in a shared process pool.
+
+    Inference never runs on the event loop that carries audio frames. Requests
+    arriving within `max_wait_ms` of each other, typically from concurrent
+    sessions in the same worker, are merged into one pool call of up to
+    `max_batch_size` texts.
+    """
+
+    def __init__(
+        self,
+        model: str = LOCAL_EMBEDDING_MODEL,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_workers: int = 1,
+    ):
+        self.model = model
+        self.name = f"local:{model}"
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_workers = max_workers
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._batcher: Optional[asyncio.Task] = None
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((list(texts), future))
+        if self._batcher is None or self._batcher.done():
+            self._batcher = asyncio.create_task(self._run_batches())
+        return await future
+
+    async def _run_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        pool = _get_process_pool(self.max_workers)
+        while self._pending:
+            await asyncio.sleep(self.max_wait_ms / 1000)
+            batch: List[Tuple[List[str], asyncio.Future]] = []
+            size = 0
+            while self._pending and (not batch or size + len(self._pending[0][0]) <= self.max_batch_size):
+                request = self._pending.pop(0)
+                batch.append(request)
+                size += len(request[0])
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                vectors = await loop.run_in_executor(pool, _embed_in_pool, self.model, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+
+class EmbeddingCache:
+    """Content-hash keyed embedding store on disk.
+
+    Backed by SQLite in WAL mode so several worker processes can read and write
+    the same cache file. A document is only re-embedded when its text (or the
+    embedding model) changes.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get_many(self, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(unique), 500):
+            chunk = unique[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})", chunk)
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        if not vectors:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (hash, vector) VALUES (?, ?)",
+            [(key, np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in vectors.items()],
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+async def embed_documents(
+    texts: Sequence[str],
+    provider: EmbeddingProvider,
+    cache: Optional[EmbeddingCache] = None,
+    batch_size: int = 64,
+    max_concurrent_requests: int = 4,
+) -> np.ndarray:
+    """Embed `texts` in batches of `batch_size`, returning a float32 matrix with one row per text.
+
+    Texts already present in `cache` are not sent to the provider, so a restart
+    only pays for documents that changed since the last run.
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    hashes = [content_hash(text, provider.name) for text in texts]
+    vectors = cache.get_many(hashes) if cache else {}
+
+    missing: Dict[str, str] = {}
+    for key, text in zip(hashes, texts):
+        if key not in vectors:
+            missing.setdefault(key, text)
+
+    if missing:
+        semaphore = asyncio.Semaphore(max_concurrent_requests)
+        items = list(missing.items())
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+        async def embed_batch(batch: List[tuple]) -> Dict[str, np.ndarray]:
+            async with semaphore:
+                matrix = await provider.embed([text for _, text in batch])
+            return {key: matrix[row] for row, (key, _) in enumerate(batch)}
+
+        fresh: Dict[str, np.ndarray] = {}
+        for result in await asyncio.gather(*(embed_batch(batch) for batch in batches)):
+            fresh.update(result)
+        if cache:
+            cache.put_many(fresh)
+        vectors.update(fresh)
+
+    return np.vstack([vectors[key] for key in hashes]).astype(np.float32, copy=False)
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivially different phrasings share a cache entry."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+class QueryEmbeddingCache:
+    """LRU cache of query embeddings keyed by the normalized query text.
+
+    The stored vector is the embedding of the first phrasing that missed the
+    cache; later phrasings with the same key reuse it.
+
+    Concurrent misses for the same query share one API request, and a request
+    keeps running (and fills the cache) even if the caller that started it is
+    cancelled.
+    """
+
+    def __init__(self, provider: EmbeddingProvider, max_entries: int = 1024):
+        self.provider = provider
+        self._max_entries = max_entries
+        self._store: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    async def get(self, text: str) -> np.ndarray:
+        key = normalize_query(text)
+        cached = self._store.get(key)
+        if cached is not None:
+            self._store.move_to_end(key)
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, text))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, text: str) -> np.ndarray:
+        # The normalized key only groups phrasings; the model sees the original text
+        vector = (await self.provider.embed([text]))[0]
+        self._store[key] = vector
+        self._store.move_to_end(key)
+        while len(self._store) > self._max_entries:
+            self._store.popitem(last=False)
+        return vector
@@ -1,71 +1,85 @@
 import asyncio
-from videosdk.agents import Agent, AgentSession, Pipeline, WorkerJob, JobContext, RoomOptions
+from videosdk.agents import Agent, AgentSession, Pipeline, WorkerJob, JobContext, RoomOptions, SpeechEventType, run_stt
 from videosdk.plugins.openai import OpenAILLM
 from videosdk.plugins.deepgram import DeepgramSTT
 from videosdk.plugins.silero import SileroVAD
 from videosdk.plugins.turn_detector import TurnDetector, pre_download_model
 from videosdk.plugins.elevenlabs import ElevenLabsTTS
-from openai import AsyncOpenAI
-import chromadb
+from embeddings import (
+    EmbeddingCache,
+    EmbeddingProvider,
+    LocalEmbeddingProvider,
+    OpenAIEmbeddingProvider,
+    QueryEmbeddingCache,
+    shutdown_process_pool,
+)
+from retrieval import HybridRetriever, SpeculativeRetriever
+from retrieval_gate import RetrievalGate
+from context_slot import ContextSlot
+from corpus import CorpusIndex
 import numpy as np
+import logging
 import os
-
-pre_download_model()
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".rag_cache")
+INDEX_DIR = os.path.join(CACHE_DIR, "index")
+# Every .txt / .md file in this directory is chunked and indexed. Edits are
+# picked up while the worker is running; no restart needed.
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+"""
+str: The ultimate guidebook for our VideoSDK integration guru! The FAQ files in this folder power the RAG pipeline, embedding VideoSDK's integration secrets into vectors via OpenAI's `text-embedding-ada-002` (or a local ONNX model) and storing them in a memory-mapped vector index on disk. From creating meetings to live streaming, these nuggets of wisdom enable the assistant to deliver precise answers, transcribed by Deepgram's audio wizardry and voiced through ElevenLabs' sonic brilliance. Drop in your own VideoSDK FAQs or custom docs to make this assistant the go-to expert for video integration queries!
+"""
+CORPUS_POLL_INTERVAL = 2.0
+EMBEDDING_BATCH_SIZE = 64
+CONTEXT_TOKEN_BUDGET = 600
+# "openai" (hosted) or "local" (on-box ONNX model, requires `pip install fastembed`)
+EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "openai")
+
+
+def make_embedding_provider(backend: str) -> EmbeddingProvider:
+    if backend == "local":
+        return LocalEmbeddingProvider()
+    if backend == "openai":
+        return OpenAIEmbeddingProvider()
+    raise ValueError(f"Unknown RAG_EMBEDDING_BACKEND: {backend}")
+
+
+# Shared by every session in this worker process. Created by the first job rather than at
+# import: the local embedding backend's spawn pool re-imports this module in every pool
+# process, which must not build a provider, open the cache database or index the corpus.
+query_embedding_cache: Optional[QueryEmbeddingCache] = None
+knowledge: Optional[CorpusIndex] = None
+
+
+def init_shared_resources() -> None:
+    global query_embedding_cache, knowledge
+    if knowledge is not None:
+        return
+    embedding_provider = make_embedding_provider(EMBEDDING_BACKEND)
+    embedding_cache = EmbeddingCache(os.path.join(CACHE_DIR, "embeddings.sqlite3"))
+    query_embedding_cache = QueryEmbeddingCache(embedding_provider, max_entries=1024)
+    knowledge = CorpusIndex(
+        CORPUS_DIR, INDEX_DIR, embedding_provider, cache=embedding_cache, batch_size=EMBEDDING_BATCH_SIZE
+    )
 
 
 class VoiceAgent(Agent):
-    def __init__(self):
+    def __init__(self, corpus: CorpusIndex):
         super().__init__(
             instructions="You are a helpful voice assistant that answers questions based on provided context. Use the retrieved documents to ground your answers. If no relevant context is found, say so."
         )
-        # Initialize OpenAI client for embeddings
-        self.openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        # FAQ documents from VideoSDK Integration FAQ
-        self.documents = [
-            "What is VideoSDK? VideoSDK is a comprehensive video calling and live streaming platform supporting Web (JavaScript), Mobile (React Native, Flutter, Android, iOS), and Server-side REST APIs.",
-            "How do I authenticate with VideoSDK? Use JWT tokens generated with your API key and secret from the VideoSDK dashboard, including permissions and expiration time.",
-            "How do I create a video meeting room? Call the VideoSDK REST API or use VideoSDK.createMeeting() to generate a meeting ID for participants to join.",
-            "How do I implement screen sharing in VideoSDK? Use enableScreenShare() to start and disableScreenShare() to stop, listening to screen-share-started and screen-share-stopped events.",
-            "How do I record video meetings? Start recording with startRecording(), configure mode (video-and-audio or audio-only) and quality, and stop with stopRecording().",
-            "Can I live stream VideoSDK meetings to social media? Yes, use startLivestream() with RTMP URLs for platforms like YouTube or Facebook, supporting multiple platforms simultaneously."
-        ]
-        """
-        List[str]: The ultimate guidebook for our VideoSDK integration guru! This collection of FAQ entries powers the RAG pipeline, embedding VideoSDK's integration secrets into vectors via OpenAI's `text-embedding-ada-002` and storing them in Chroma DB's digital vault. From creating meetings to live streaming, these nuggets of wisdom enable the assistant to deliver precise answers, transcribed by Deepgram's audio wizardry and voiced through ElevenLabs' sonic brilliance. Swap with your own VideoSDK FAQs or expand with custom docs to make this assistant the go-to expert for video integration queries!
-        """
-
-        # Set up Chroma DB
-        self.chroma_client = chromadb.Client()  # In-memory client; use PersistentClient for disk storage
-        self.collection = self.chroma_client.create_collection(name="videosdk_faq_collection")
-
-        # Generate embeddings and add to Chroma
-        embeddings = [self._get_embedding_sync(doc) for doc in self.documents]
-        self.collection.add(
-            documents=self.documents,
-            embeddings=embeddings,
-            ids=[f"doc_{i}" for i in range(len(self.documents))]
-        )
-
-    def _get_embedding_sync(self, text: str) -> np.ndarray:
-        """Synchronous embedding for initialization (since __init__ can't be async)."""
-        import openai  # Use sync client for init
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        response = client.embeddings.create(input=text, model="text-embedding-ada-002")
-        return response.data[0].embedding
+        self.retriever = HybridRetriever(corpus.snapshot, embed=self.get_embedding)
 
     async def get_embedding(self, text: str) -> np.ndarray:
-        """Async embedding for queries."""
-        response = await self.openai_client.embeddings.create(input=text, model="text-embedding-ada-002")
-        return response.data[0].embedding
+        """Async embedding for queries, served from the worker-wide LRU cache when possible."""
+        return await query_embedding_cache.get(text)
 
     async def retrieve(self, query: str, k: int = 2) -> list[str]:
-        """Retrieve top-k documents from Chroma DB."""
-        query_emb = await self.get_embedding(query)
-        results = self.collection.query(
-            query_embeddings=[query_emb],
-            n_results=k
-        )
-        return results["documents"][0]  # List of matching documents
+        """Retrieve top-k documents with BM25 + dense fusion, skipping the embedding call on confident keyword hits."""
+        return await self.retriever.retrieve(query, k)
 
     async def on_enter(self) -> None:
         await self.session.say("Hello, how can I help you today?")
@@ -74,8 +88,17 @@ class VoiceAgent(Agent):
         await self.session.say("Goodbye!")
 
 
+def render_retrieved_context(docs: list[str]) -> str:
+    context_str = "\n\n".join(f"Document {i + 1}: {doc}" for i, doc in enumerate(docs))
+    return f"Retrieved Context:\n{context_str}\n\nUse this context to answer the user's question."
+
+
 async def entrypoint(ctx: JobContext):
-    agent = VoiceAgent()
+    init_shared_resources()
+    ctx.add_shutdown_callback(shutdown_process_pool)
+    await knowledge.refresh()
+    knowledge.start_watching(CORPUS_POLL_INTERVAL)
+    agent = VoiceAgent(corpus=knowledge)
 
     pipeline = Pipeline(
         stt=DeepgramSTT(),
@@ -85,21 +108,37 @@ async def entrypoint(ctx: JobContext):
         turn_detector=TurnDetector()
     )
 
+    gate = RetrievalGate()
+    speculator = SpeculativeRetriever(agent.retrieve, similarity_threshold=0.8)
+    retrieved_context = ContextSlot(agent, render=render_retrieved_context, max_tokens=CONTEXT_TOKEN_BUDGET)
+
+    # Pipeline hook: start retrieval speculatively while the user is still speaking
+    @pipeline.on("stt")
+    async def stt_hook(audio_stream):
+        async for event in run_stt(audio_stream):
+            if event.event_type in (SpeechEventType.INTERIM, SpeechEventType.PREFLIGHT) and event.data and event.data.text:
+                if gate.evaluate(event.data.text).retrieve:
+                    speculator.on_interim(event.data.text)
+            yield event
+
     # Pipeline hook: retrieve relevant documents at the start of each user turn
-    # and inject them into the agent's context before the LLM responds
+    # and swap them into the agent's context before the LLM responds. The slot
+    # replaces the previous turn's documents, so the prompt does not grow.
+    # Turns like "yes" or "thanks" skip retrieval and keep the previous documents.
     @pipeline.on("user_turn_start")
     async def on_user_turn_start(transcript: str):
-        context_docs = await agent.retrieve(transcript)
-        if context_docs:
-            context_str = "\n\n".join(f"Document {i + 1}: {doc}" for i, doc in enumerate(context_docs))
-            agent.chat_context.add_message(
-                role="system",
-                content=f"Retrieved Context:\n{context_str}\n\nUse this context to answer the user's question."
-            )
+        if not gate.decide(transcript).retrieve:
+            speculator.discard()
+            return
+        retrieved_context.update(await speculator.resolve(transcript))
 
     session = AgentSession(agent=agent, pipeline=pipeline)
 
-    await session.start(wait_for_participant=True, run_until_shutdown=True)
+    try:
+        await session.start(wait_for_participant=True, run_until_shutdown=True)
+    finally:
+        speculator.close()
+        logger.info(f"Retrieval gate: {gate.stats.summary()}")
 
 
 def make_context() -> JobContext:
@@ -108,5 +147,6 @@ def make_context() -> JobContext:
 
 
 if __name__ == "__main__":
+    pre_download_model()
     job = WorkerJob(entrypoint=entrypoint, jobctx=make_context)
     job.start()
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bm25 import BM25Index
+from embeddings import normalize_query
+from vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+def transcript_similarity(a: str, b: str) -> float:
+    """Word-level similarity in [0, 1] between two transcripts."""
+    return SequenceMatcher(None, normalize_query(a).split(), normalize_query(b).split()).ratio()
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> List[int]:
+    """Fuse several ranked lists of ids: each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever:
+    """BM25 + dense retrieval fused with reciprocal rank fusion.
+
+    `snapshot` returns the current (vector index, BM25 index) pair, built from
+    the same texts; it is read once per query, so an index swapped in by a
+    corpus refresh is used from the next query on. When the lexical ranking
+    alone is decisive (top score above `fast_path_min_score`
+    and at least `fast_path_margin` times the runner-up), the dense query is
+    skipped entirely, so exact keyword questions need no embedding call.
+    """
+
+    def __init__(
+        self,
+        snapshot: Callable[[], Tuple[VectorIndex, BM25Index]],
+        embed: Callable[[str], Awaitable[np.ndarray]],
+        candidates: int = 10,
+        rrf_k: int = 60,
+        fast_path_min_score: float = 3.0,
+        fast_path_margin: float = 3.0,
+    ):
+        self._snapshot = snapshot
+        self._embed = embed
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.fast_path_min_score = fast_path_min_score
+        self.fast_path_margin = fast_path_margin
+        self.fast_path_hits = 0
+        self.dense_queries = 0
+
+    def _confident_lexical(self, ranked: List[tuple]) -> Optional[List[int]]:
+        if not ranked or ranked[0][1] < self.fast_path_min_score:
+            return None
+        top = ranked[0][1]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if runner_up * self.fast_path_margin > top:
+            return None
+        return [doc_id for doc_id, score in ranked if score * self.fast_path_margin >= top]
+
+    async def retrieve(self, query: str, k: int = 2) -> List[str]:
+        index, bm25 = self._snapshot()
+        lexical = bm25.search(query, self.candidates)
+        confident = self._confident_lexical(lexical)
+        if confident is not None:
+            self.fast_path_hits += 1
+            return [index.texts[i] for i in confident[:k]]
+
+        self.dense_queries += 1
+        dense = index.search(await self._embed(query), self.candidates)
+        fused = reciprocal_rank_fusion([[i for i, _ in lexical], [i for i, _ in dense]], k=self.rrf_k)
+        return [index.texts[i] for i in fused[:k]]
+
+
+class SpeculativeRetriever:
+    """Starts retrieval on interim STT transcripts so results are usually ready when the turn ends.
+
+    `on_interim` (re)starts a background retrieval whenever the interim text has
+    drifted from the query being speculated on. `resolve` is called with the
+    final transcript: if it is still within `similarity_threshold` of the
+    speculative query, the in-flight (or finished) result is reused; otherwise
+    the speculation is discarded and a fresh retrieval runs.
+    """
+
+    def __init__(
+        self,
+        retrieve: Callable[[str], Awaitable[List[str]]],
+        similarity_threshold: float = 0.8,
+        min_words: int = 3,
+    ):
+        self._retrieve = retrieve
+        self.similarity_threshold = similarity_threshold
+        self.min_words = min_words
+        self._query: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def on_interim(self, text: str) -> None:
+        text = text.strip()
+        if len(text.split()) < self.min_words:
+            return
+        if self._query is not None and transcript_similarity(self._query, text) >= self.similarity_threshold:
+            return
+        self.discard()
+        self._query = text
+        self._task = asyncio.create_task(self._retrieve(text))
+
+    async def resolve(self, transcript: str) -> List[str]:
+        task, query = self._task, self._query
+        self._task, self._query = None, None
+        if task is not None:
+            if transcript_similarity(query, transcript) >= self.similarity_threshold:
+                try:
+                    docs = await task
+                    self.hits += 1
+                    logger.debug(f"Speculative retrieval hit for '{transcript}'")
+                    return docs
+                except Exception as e:
+                    logger.warning(f"Speculative retrieval failed, retrying: {e}")
+            else:
+                task.cancel()
+        self.misses += 1
+        return await self._retrieve(transcript)
+
+    def discard(self) -> None:
+        """Drop any in-flight speculation, e.g. when the turn turns out not to need retrieval."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task, self._query = None, None
+
+    def close(self) -> None:
+        self.discard()
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.json"
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+
+def corpus_fingerprint(hashes: Sequence[str]) -> str:
+    return hashlib.sha256("\n".join(hashes).encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_index(directory: str, ids: Sequence[str], texts: Sequence[str], embeddings: np.ndarray, fingerprint: str) -> None:
+    """Write a flat, L2-normalized float32 matrix plus an id/text sidecar to `directory`.
+
+    Both files are replaced atomically, so a worker that opens the index while
+    another one is rebuilding it sees either the old or the new version.
+    """
+    os.makedirs(directory, exist_ok=True)
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.maximum(norms, 1e-12)
+
+    _atomic_write(os.path.join(directory, VECTORS_FILE), matrix.tobytes())
+    meta = {
+        "fingerprint": fingerprint,
+        "count": int(matrix.shape[0]),
+        "dim": int(matrix.shape[1]),
+        "ids": list(ids),
+        "texts": list(texts),
+    }
+    # The sidecar goes last: its fingerprint is what readers check for staleness
+    _atomic_write(os.path.join(directory, META_FILE), json.dumps(meta).encode("utf-8"))
+
+
+def read_fingerprint(directory: str) -> Optional[str]:
+    try:
+        with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f).get("fingerprint")
+    except (OSError, ValueError):
+        return None
+
+
+def version_dir(root: str, fingerprint: str) -> str:
+    return os.path.join(root, VERSIONS_DIR, fingerprint[:16])
+
+
+def read_current(root: str) -> Optional[str]:
+    """Return the directory of the published index version under `root`, if any."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    return os.path.join(root, VERSIONS_DIR, name) if name else None
+
+
+def publish_version(root: str, directory: str) -> None:
+    """Atomically point `root`/CURRENT at an index version written by `write_index`."""
+    _atomic_write(os.path.join(root, CURRENT_FILE), os.path.basename(directory).encode("utf-8"))
+
+
+def prune_versions(root: str, keep: Sequence[str]) -> None:
+    """Delete index versions not listed in `keep`.
+
+    Processes that still map a deleted version keep reading it until they swap;
+    the file is only freed once the last mapping goes away.
+    """
+    versions = os.path.join(root, VERSIONS_DIR)
+    keep_names = {os.path.basename(path) for path in keep}
+    for name in os.listdir(versions) if os.path.isdir(versions) else []:
+        if name not in keep_names:
+            shutil.rmtree(os.path.join(versions, name), ignore_errors=True)
+
+
+class VectorIndex:
+    """Read-only, memory-mapped view of an index written by `write_index`.
+
+    Every worker process maps the same file, so the corpus lives once in the OS
+    page cache no matter how many processes or concurrent rooms use it.
+    """
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.fingerprint: str = meta["fingerprint"]
+        self.ids: List[str] = meta["ids"]
+        self.texts: List[str] = meta["texts"]
+        count, dim = meta["count"], meta["dim"]
+        if count:
+            self.vectors = np.memmap(os.path.join(directory, VECTORS_FILE), dtype=np.float32, mode="r", shape=(count, dim))
+        else:
+            self.vectors = np.zeros((0, dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: np.ndarray, k: int = 2) -> List[Tuple[int, float]]:
+        """Return up to `k` (row, cosine similarity) pairs, best first."""
+        if not len(self) or k <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        scores = self.vectors @ q
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
@@ -22,7 +22,6 @@ Env: see `.env.example` at the repo root for all variables (VideoSDK auth + prov
 """
 
 import logging
-import aiohttp
 from videosdk.agents import (
     Agent,
     AgentSession,
@@ -35,6 +34,7 @@ from videosdk.agents import (
     WorkerJob,
     function_tool,
 )
+from http_client import attach_http_session, with_http_session
 from videosdk.plugins.google import GoogleLLM
 from videosdk.plugins.deepgram import DeepgramSTT
 from videosdk.plugins.silero import SileroVAD
@@ -46,7 +46,8 @@ pre_download_model()
 
 
 @function_tool
-async def get_weather(latitude: str, longitude: str):
+@with_http_session
+async def get_weather(latitude: str, longitude: str, http=None):
     """Called when the user asks about the weather. Estimates latitude and longitude from location name.
 
     Args:
@@ -54,16 +55,15 @@ async def get_weather(latitude: str, longitude: str):
         longitude: The longitude of the location
     """
     url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&current=temperature_2m"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            if response.status == 200:
-                data = await response.json()
-                return {
-                    "temperature": data["current"]["temperature_2m"],
-                    "temperature_unit": "Celsius",
-                }
-            else:
-                raise Exception(f"Failed to get weather data, status code: {response.status}")
+    async with http.get(url) as response:
+        if response.status == 200:
+            data = await response.json()
+            return {
+                "temperature": data["current"]["temperature_2m"],
+                "temperature_unit": "Celsius",
+            }
+        else:
+            raise Exception(f"Failed to get weather data, status code: {response.status}")
 
 
 class VoiceAgent(Agent):
@@ -131,6 +131,7 @@ def make_recording_options() -> RecordingOptions | None:
 
 
 async def entrypoint(ctx: JobContext):
+    attach_http_session(ctx)
     agent = VoiceAgent()
 
     pipeline = Pipeline(
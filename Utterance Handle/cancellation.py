@@ -0,0 +1,173 @@
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+from videosdk.agents import UtteranceHandle
+
+logger = logging.getLogger(__name__)
+
+
+class ToolCancelled(Exception):
+    """Raised by `CancellationToken.run` and `raise_if_cancelled` once the token is cancelled."""
+
+
+@dataclass
+class CancellationStats:
+    cancelled_tools: int = 0
+    aborted_tasks: int = 0
+    saved_seconds: float = 0.0
+    total_abort_ms: float = 0.0
+
+    @property
+    def mean_abort_ms(self) -> float:
+        return self.total_abort_ms / self.cancelled_tools if self.cancelled_tools else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.cancelled_tools} tools cancelled, {self.aborted_tasks} in-flight tasks aborted, "
+            f"~{self.saved_seconds:.1f}s of tool work saved, {self.mean_abort_ms:.1f} ms mean abort latency"
+        )
+
+
+# Worker-wide; logged when a job shuts down
+cancellation_stats = CancellationStats()
+
+
+class CancellationToken:
+    """Cooperative cancellation for one tool call.
+
+    Tasks registered with `link` (or started with `run`) are cancelled the
+    moment the token is, so in-flight I/O such as HTTP requests is aborted
+    right away instead of at the tool's next check. Tools can also
+    `await token.cancelled()` or call `raise_if_cancelled()` between steps.
+    """
+
+    def __init__(self):
+        self._event = asyncio.Event()
+        self._tasks: Set[asyncio.Task] = set()
+        self._callbacks: List[Callable[[], Any]] = []
+        self._watcher: Optional[asyncio.Task] = None
+        self._body: Optional[asyncio.Task] = None
+        self.reason: Optional[str] = None
+        self.cancelled_at: Optional[float] = None
+        self.aborted = 0
+
+    @classmethod
+    def from_utterance(cls, handle: Optional[UtteranceHandle]) -> "CancellationToken":
+        """A token that is cancelled when `handle` is interrupted (e.g. the user barges in)."""
+        token = cls()
+        if handle is not None:
+            token._watcher = asyncio.create_task(token._watch(handle))
+        return token
+
+    async def _watch(self, handle: UtteranceHandle) -> None:
+        await handle
+        if handle.interrupted:
+            self.cancel("interrupted")
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    async def cancelled(self) -> None:
+        """Wait until the token is cancelled."""
+        await self._event.wait()
+
+    def raise_if_cancelled(self) -> None:
+        if self.is_cancelled:
+            raise ToolCancelled(self.reason)
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if self.is_cancelled:
+            return
+        self.reason = reason
+        self.cancelled_at = time.perf_counter()
+        self._event.set()
+        for task in list(self._tasks):
+            if not task.done():
+                task.cancel()
+                # The tool body itself is counted as the cancelled tool, not as an aborted task
+                if task is not self._body:
+                    self.aborted += 1
+        for callback in self._callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], Any]) -> None:
+        if self.is_cancelled:
+            callback()
+        else:
+            self._callbacks.append(callback)
+
+    def link(self, task: asyncio.Task) -> asyncio.Task:
+        """Cancel `task` together with this token."""
+        if self.is_cancelled:
+            task.cancel()
+            return task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def run(self, awaitable: Awaitable[Any]) -> Any:
+        """Await `awaitable` as a linked child task; raises `ToolCancelled` if the token is cancelled first."""
+        return await self._await(self.link(asyncio.ensure_future(awaitable)))
+
+    async def _run_body(self, awaitable: Awaitable[Any]) -> Any:
+        self._body = self.link(asyncio.ensure_future(awaitable))
+        return await self._await(self._body)
+
+    async def _await(self, task: asyncio.Task) -> Any:
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if self.is_cancelled:
+                raise ToolCancelled(self.reason) from None
+            raise
+
+    def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+
+
+def cancellable(expected_seconds: Optional[float] = None):
+    """Give a tool method a `cancel_token` tied to the current utterance; place it under `@function_tool`.
+
+    The tool body runs as a task linked to the token, so an interruption
+    aborts whatever it is awaiting within milliseconds; most tools need
+    nothing else. Tools that want the token itself declare `cancel_token=None`
+    without a type hint so it stays out of the tool schema. When
+    `expected_seconds` is given, the unspent part of it counts towards the
+    saved-work metric.
+    """
+
+    def decorator(fn):
+        wants_token = "cancel_token" in inspect.signature(fn).parameters
+
+        @wraps(fn)
+        async def wrapper(self, *args, **kwargs):
+            token = CancellationToken.from_utterance(self.session.current_utterance)
+            if wants_token:
+                kwargs["cancel_token"] = token
+            start = time.perf_counter()
+            try:
+                return await token._run_body(fn(self, *args, **kwargs))
+            except ToolCancelled:
+                return {"response": f"{fn.__name__} was cancelled because the user interrupted."}
+            finally:
+                token.close()
+                if token.is_cancelled:
+                    elapsed = token.cancelled_at - start
+                    cancellation_stats.cancelled_tools += 1
+                    cancellation_stats.aborted_tasks += token.aborted
+                    cancellation_stats.total_abort_ms += (time.perf_counter() - token.cancelled_at) * 1000
+                    if expected_seconds is not None:
+                        cancellation_stats.saved_seconds += max(0.0, expected_seconds - elapsed)
+                    logger.info(f"{fn.__name__} cancelled after {elapsed:.2f}s ({token.reason})")
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,80 @@
+import asyncio
+import weakref
+from functools import wraps
+
+import aiohttp
+from videosdk.agents import JobContext
+
+# Connection pool shared by every tool call and session on the same event loop
+POOL_LIMIT = 100
+POOL_LIMIT_PER_HOST = 10
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = 10
+
+# An aiohttp session only works on the loop it was created on, so there is one per loop
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+_jobs: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, int]" = weakref.WeakKeyDictionary()
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Return the pooled aiohttp session for the running event loop, creating it on first use.
+
+    Connections are kept alive and reused across calls, so repeated requests
+    to the same host skip DNS, TCP and TLS setup. A new session is created if
+    the loop's previous one was closed.
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_LIMIT,
+            limit_per_host=POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT))
+        _sessions[loop] = session
+    return session
+
+
+async def close_http_session() -> None:
+    """Close the running event loop's pooled session, if it has one."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def attach_http_session(ctx: JobContext) -> None:
+    """Tie the pooled session's lifetime to the jobs running on this event loop.
+
+    Each job registers itself here; the loop's session is closed when the last
+    job on it shuts down, not while other sessions may still use it. Call it
+    from the job's entrypoint.
+    """
+    loop = asyncio.get_running_loop()
+    _jobs[loop] = _jobs.get(loop, 0) + 1
+
+    async def release() -> None:
+        _jobs[loop] -= 1
+        if _jobs[loop] == 0:
+            del _jobs[loop]
+            await close_http_session()
+
+    ctx.add_shutdown_callback(release)
+
+
+def with_http_session(fn):
+    """Inject the pooled session into a tool as its `http` keyword argument.
+
+    Declare `http` without a type hint: unannotated parameters are left out of
+    the tool schema the LLM sees.
+    """
+
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if kwargs.get("http") is None:
+            kwargs["http"] = get_http_session()
+        return await fn(*args, **kwargs)
+
+    return wrapper
@@ -1,7 +1,8 @@
 import asyncio
 import logging
-import aiohttp
-from videosdk.agents import Agent, AgentSession, Pipeline, function_tool, WorkerJob, JobContext, RoomOptions, UtteranceHandle
+from videosdk.agents import Agent, AgentSession, Pipeline, function_tool, WorkerJob, JobContext, RoomOptions
+from http_client import attach_http_session, with_http_session
+from cancellation import cancellable, cancellation_stats
 from videosdk.plugins.openai import OpenAILLM
 from videosdk.plugins.deepgram import DeepgramSTT
 from videosdk.plugins.silero import SileroVAD
@@ -32,12 +33,15 @@ class VoiceAgent(Agent):
         await self.session.say("Goodbye!")
 
     @function_tool
-    async def get_weather(self, latitude: str, longitude: str) -> dict:
+    @cancellable()
+    @with_http_session
+    async def get_weather(self, latitude: str, longitude: str, http=None) -> dict:
         """
         Fetches current weather for a given location using the Open-Meteo API.
 
         Supports interruption:
-        If the user starts speaking while the agent is responding, the task cancels gracefully.
+        If the user starts speaking while the agent is responding, @cancellable aborts
+        the in-flight HTTP request or speech wait immediately and the task cancels gracefully.
 
         Args:
             latitude (str): Latitude of the location
@@ -45,7 +49,6 @@ class VoiceAgent(Agent):
             dont ask user for latitude and longitude, estimate it.
         """
         logger.info(f"### Getting weather for lat={latitude}, lon={longitude}")
-        utterance: UtteranceHandle | None = self.session.current_utterance
 
         try:
             url = (
@@ -53,11 +56,10 @@ class VoiceAgent(Agent):
                 f"?latitude={latitude}&longitude={longitude}&current=temperature_2m"
             )
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        raise Exception(f"Weather API failed with status {response.status}")
-                    data = await response.json()
+            async with http.get(url) as response:
+                if response.status != 200:
+                    raise Exception(f"Weather API failed with status {response.status}")
+                data = await response.json()
 
             temperature = data["current"]["temperature_2m"]
 
@@ -73,39 +75,33 @@ class VoiceAgent(Agent):
             # asyncio.create_task(self.session.say(f"The current temperature is {temperature}°C."))
             # asyncio.create_task(self.session.say("Do you live in this city?"))
 
-            # Check if user interrupted mid-speech
-            if utterance and utterance.interrupted:
-                return {"response": "Weather request cancelled due to user interruption."}
-
             return {"response": f"The temperature is {temperature}°C."}
 
-        except asyncio.CancelledError:
-            return {"response": "Weather task cancelled."}
         except Exception as e:
             logger.error(f"Error fetching weather: {e}")
             return {"response": "Sorry, I couldn't fetch the weather right now."}
 
     @function_tool
+    @cancellable(expected_seconds=10)
     async def long_running_task(self) -> str:
         """Simulates a long-running task that can be interrupted."""
         logger.info("Starting a long-running task...")
-        utterance: UtteranceHandle | None = self.session.current_utterance
-
-        try:
-            for i in range(10):
-                if utterance and utterance.interrupted:
-                    logger.info("Long-running task was interrupted by the user.")
-                    return "The task was cancelled because you interrupted me."
 
-                logger.info(f"Long-running task progress: {i+1}/10")
-                await asyncio.sleep(1)
+        # No polling of utterance.interrupted: @cancellable cancels the task on
+        # interruption, which aborts the step in progress within milliseconds.
+        for i in range(10):
+            logger.info(f"Long-running task progress: {i+1}/10")
+            await asyncio.sleep(1)
 
-            return "The long task is finally complete."
-        except asyncio.CancelledError:
-            logger.info("Long-running task was cancelled.")
-            return "The task was cancelled."
+        return "The long task is finally complete."
 
 async def entrypoint(ctx: JobContext):
+    attach_http_session(ctx)
+
+    async def log_cancellation_stats() -> None:
+        logger.info(f"Tool cancellation: {cancellation_stats.summary()}")
+
+    ctx.add_shutdown_callback(log_cancellation_stats)
     agent = VoiceAgent()
 
     pipeline = Pipeline(
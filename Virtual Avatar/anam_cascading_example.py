@@ -1,6 +1,6 @@
-import aiohttp
 import os
 from videosdk.agents import Agent, AgentSession, Pipeline, function_tool, JobContext, RoomOptions, WorkerJob, ChatRole
+from http_client import attach_http_session, with_http_session
 from videosdk.plugins.silero import SileroVAD
 from videosdk.plugins.turn_detector import TurnDetector, pre_download_model
 from videosdk.plugins.anam import AnamAvatar
@@ -16,9 +16,11 @@ load_dotenv(override=True)
 pre_download_model()
 
 @function_tool
+@with_http_session
 async def get_weather(
     latitude: str,
     longitude: str,
+    http=None,
 ):
     """Called when the user asks about the weather. This function will return the weather for
     the given location. When given a location, please estimate the latitude and longitude of the
@@ -31,19 +33,18 @@ async def get_weather(
     print("###Getting weather for", latitude, longitude)
     url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&current=temperature_2m"
     weather_data = {}
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            if response.status == 200:
-                data = await response.json()
-                print("###Weather data", data)
-                weather_data = {
-                    "temperature": data["current"]["temperature_2m"],
-                    "temperature_unit": "Celsius",
-                }
-            else:
-                raise Exception(
-                    f"Failed to get weather data, status code: {response.status}"
-                )
+    async with http.get(url) as response:
+        if response.status == 200:
+            data = await response.json()
+            print("###Weather data", data)
+            weather_data = {
+                "temperature": data["current"]["temperature_2m"],
+                "temperature_unit": "Celsius",
+            }
+        else:
+            raise Exception(
+                f"Failed to get weather data, status code: {response.status}"
+            )
 
     return weather_data
 
@@ -63,6 +64,7 @@ class MyVoiceAgent(Agent):
         
 
 async def start_session(context: JobContext):
+    attach_http_session(context)
 
     stt = DeepgramSTT(model="nova-3", language="multi", api_key=os.getenv("DEEPGRAM_API_KEY"))
     llm = OpenAILLM(model="gpt-4o-mini", api_key=os.getenv("OPENAI_API_KEY"))